@@ -1,14 +1,26 @@
 # app.py
 import streamlit as st
 import yfinance as yf
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
+from pathlib import Path
 import requests
 import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
 from dotenv import load_dotenv
 import os
+import sys
+
+# The symbol registry lives next to the agent scripts one level up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from symbol_registry import load_registry
 
 # Load environment variables
 load_dotenv()
@@ -17,55 +29,494 @@ load_dotenv()
 # 🎯 CONFIGURATION
 # =============================================
 
-# Available companies for analysis
-COMPANY_SYMBOLS = {
-    "Apple": "AAPL", "Microsoft": "MSFT", "Google": "GOOGL", 
-    "Amazon": "AMZN", "Tesla": "TSLA", "Nvidia": "NVDA",
-    "Meta": "META", "Netflix": "NFLX", "Infosys": "INFY",
-    "IBM": "IBM", "Intel": "INTC", "AMD": "AMD",
-    "Oracle": "ORCL", "Coca Cola": "KO", "Walmart": "WMT"
+# Available companies for analysis, loaded from the listings file shared with the agents
+COMPANY_REGISTRY = load_registry()
+
+# Concurrent fetch settings
+MAX_FETCH_WORKERS = int(os.getenv("MAX_FETCH_WORKERS", "8"))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "15"))  # seconds per ticker, counted from when a worker starts it
+FETCH_QUEUE_TIMEOUT = float(os.getenv("FETCH_QUEUE_TIMEOUT", "60"))  # seconds a fetch may wait for a free worker
+HISTORY_KEY = "__history__"  # key of the bulk history job among per-symbol fetch jobs
+
+# OHLCV columns kept from bulk history downloads
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Cache settings (TTLs in seconds per field group)
+CACHE_TTLS = {
+    "quote": int(os.getenv("QUOTE_TTL", "60")),
+    "fundamentals": int(os.getenv("FUNDAMENTALS_TTL", "3600")),
+    "history": int(os.getenv("HISTORY_TTL", "300")),
 }
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2000"))
+
+# On-disk daily bar store (set HISTORY_STORE_DIR to an empty string to disable)
+HISTORY_STORE_DIR = os.getenv("HISTORY_STORE_DIR", str(Path(__file__).parent / "data" / "ohlcv"))
+
+# Calendar days covered by each history period
+PERIOD_DAYS = {"1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731}
+# Relative close-price difference between a stored and a re-downloaded bar that means Yahoo
+# re-adjusted past prices (after a split or dividend)
+ADJUSTMENT_TOLERANCE = 1e-4
+
+# Analytics settings
+TRADING_DAYS = 252
+VOLATILITY_WINDOW = 21  # trading days in the rolling volatility window
+BENCHMARK_SYMBOL = "^GSPC"
+BENCHMARK_NAME = "S&P 500"
+
+# Chart rendering settings
+CHART_POINT_BUDGET = int(os.getenv("CHART_POINT_BUDGET", "1000"))  # max points per series, about the chart's pixel width
+WEBGL_POINT_THRESHOLD = int(os.getenv("WEBGL_POINT_THRESHOLD", "5000"))  # total points before switching to WebGL traces
+
+# Background refresh settings
+BACKGROUND_REFRESH = os.getenv("BACKGROUND_REFRESH", "true").lower() == "true"
+REFRESH_PERIODS = os.getenv("REFRESH_PERIODS", "1mo,3mo,6mo,1y,2y").split(",")
+REFRESH_MAX_SYMBOLS = int(os.getenv("REFRESH_MAX_SYMBOLS", "50"))
+REFRESH_FRACTION = 0.75  # refresh each field group after this fraction of its TTL
+REFRESH_JITTER = 0.1  # +/- fraction of random jitter on every refresh interval
+REFRESH_MAX_BACKOFF = 900  # seconds
+
+# =============================================
+# 🗄️ MARKET DATA CACHE
+# =============================================
+
+class MarketDataCache:
+    """Thread-safe TTL + LRU cache keyed on (symbol, period, field group)"""
+    
+    def __init__(self, ttls, max_entries):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key, value, ttl=None):
+        """Store a value with the TTL of its field group (or `ttl`), evicting the least recently used"""
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttls[key[2]])
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def stats(self):
+        """Return entry count and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+@st.cache_resource
+def get_market_cache():
+    """Market data cache shared by every session in this server process"""
+    return MarketDataCache(CACHE_TTLS, CACHE_MAX_ENTRIES)
+
+# =============================================
+# 💾 HISTORY STORE
+# =============================================
+
+class HistoryStore:
+    """Per-symbol Parquet files of daily OHLCV bars, extended by appending new bars"""
+    
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def _path(self, symbol):
+        return self.directory / f"{symbol.replace('/', '_')}.parquet"
+    
+    def read(self, symbol):
+        """Return the stored bars for a symbol, or None if nothing is stored"""
+        path = self._path(symbol)
+        if not path.exists():
+            return None
+        return pd.read_parquet(path)
+    
+    def append(self, symbol, bars):
+        """Merge new bars into the stored ones (newer rows win) and return the result"""
+        with self._lock:
+            stored = self.read(symbol)
+            if stored is not None:
+                bars = pd.concat([stored, bars])
+                bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+            self._write(symbol, bars)
+        return bars
+    
+    def replace(self, symbol, bars):
+        """Store bars in place of everything stored for a symbol and return them"""
+        with self._lock:
+            self._write(symbol, bars)
+        return bars
+    
+    def _write(self, symbol, bars):
+        # Write to a temporary file first so readers never see a partial file
+        path = self._path(symbol)
+        tmp_path = path.with_suffix(".tmp")
+        bars.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+@st.cache_resource
+def get_history_store():
+    """History store shared by every session, or None when disabled"""
+    if not HISTORY_STORE_DIR:
+        return None
+    return HistoryStore(HISTORY_STORE_DIR)
+
+# =============================================
+# 🧾 LAZY FUNDAMENTALS
+# =============================================
+
+def _number(value):
+    """Coerce missing or NaN yfinance values to 0"""
+    if value is None or pd.isna(value):
+        return 0
+    return value
+
+class StockFundamentals:
+    """Quote and fundamentals for one symbol, loaded by field group on first access
+    
+    Quote fields come from yfinance's lightweight `fast_info`; the full `info` dict
+    is only requested when a fundamentals field is read, and only the wanted
+    fields are kept. Supports dict-style access like the plain dicts it replaces.
+    """
+    
+    QUOTE_FIELDS = ('current_price', 'market_cap', 'volume')
+    # Dashboard field -> key in yfinance's `info` dict
+    FUNDAMENTAL_FIELDS = {'pe_ratio': 'trailingPE'}
+    
+    __slots__ = ('symbol', '_cache', '_ticker', '_fields')
+    
+    def __init__(self, symbol, cache):
+        self.symbol = symbol
+        self._cache = cache
+        self._ticker = None
+        self._fields = {'symbol': symbol}
+    
+    def _get_ticker(self):
+        if self._ticker is None:
+            self._ticker = yf.Ticker(self.symbol)
+        return self._ticker
+    
+    def load(self, group):
+        """Load a field group ("quote" or "fundamentals") from the cache or yfinance"""
+        key = (self.symbol, None, group)
+        fields = self._cache.get(key)
+        if fields is None:
+            if group == "quote":
+                fast_info = self._get_ticker().fast_info
+                fields = {
+                    'current_price': _number(fast_info.last_price),
+                    'market_cap': _number(fast_info.market_cap),
+                    'volume': _number(fast_info.last_volume)
+                }
+            else:
+                info = self._get_ticker().info
+                fields = {field: _number(info.get(name)) for field, name in self.FUNDAMENTAL_FIELDS.items()}
+            self._cache.set(key, fields)
+        self._fields.update(fields)
+        return self
+    
+    def __getitem__(self, field):
+        if field not in self._fields:
+            if field in self.QUOTE_FIELDS:
+                self.load("quote")
+            elif field in self.FUNDAMENTAL_FIELDS:
+                self.load("fundamentals")
+        return self._fields[field]
+    
+    def __setitem__(self, field, value):
+        self._fields[field] = value
+    
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
 
 # =============================================
 # 🛠️ UTILITY FUNCTIONS
 # =============================================
 
-def get_stock_data(symbol, period="1mo"):
-    """Get stock data using yfinance"""
+@st.cache_resource
+def get_fetch_pool():
+    """Shared thread pool that bounds concurrent Yahoo Finance requests"""
+    return ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix="yf-fetch")
+
+def fetch_stock_info(symbol, cache, groups=("quote", "fundamentals")):
+    """Fetch the given field groups for a symbol using yfinance, raising on failure"""
+    data = StockFundamentals(symbol, cache)
+    for group in groups:
+        data.load(group)
+    return data
+
+def download_history(symbols, period="1mo", start=None):
+    """Download OHLCV for all symbols in one call as a wide (field, symbol) frame"""
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return pd.DataFrame()
+    
+    # An explicit start date takes precedence over the period
+    history = yf.download(
+        symbols,
+        period=None if start is not None else period,
+        start=start,
+        group_by="column",
+        auto_adjust=True,
+        progress=False,
+        timeout=FETCH_TIMEOUT
+    )
+    if history.empty:
+        return history
+    
+    # Single-ticker downloads may come back with flat columns
+    if not isinstance(history.columns, pd.MultiIndex):
+        history.columns = pd.MultiIndex.from_product([history.columns, symbols])
+    
+    history = history.loc[:, history.columns.get_level_values(0).isin(PRICE_FIELDS)]
+    if history.index.tz is not None:
+        history.index = history.index.tz_localize(None)
+    # Tickers that failed to download come back as all-NaN columns
+    return history.dropna(axis=1, how="all")
+
+def period_start(period):
+    """First calendar date covered by a history period"""
+    return pd.Timestamp.now().normalize() - pd.Timedelta(days=PERIOD_DAYS.get(period, 31))
+
+def adjustment_changed(stored, bars, tolerance=ADJUSTMENT_TOLERANCE):
+    """Whether re-downloaded bars disagree with the stored ones they overlap
+    
+    Downloads are split/dividend adjusted, and Yahoo re-adjusts every past bar after each
+    split or dividend, so a mismatch means the stored bars are on an old adjustment basis.
+    """
+    if stored is None or stored.empty or bars.empty:
+        return False
+    # The last stored bar may have been an unfinished session, so only compare completed ones
+    completed = stored.iloc[:-1]
+    common = completed.index.intersection(bars.index)
+    if common.empty:
+        return False
+    old = completed.loc[common, "Close"]
+    new = bars.loc[common, "Close"]
+    return bool(((new - old).abs() > tolerance * old.abs()).any())
+
+def sync_history(symbols, period, store):
+    """Read history from the store, downloading only bars newer than what is stored
+    
+    A symbol whose past prices were re-adjusted since they were stored is downloaded
+    again for the whole period. Returns per-symbol frames plus the symbols served from
+    stale stored bars because the download failed.
+    """
+    start = period_start(period)
+    stored = {symbol: store.read(symbol) for symbol in symbols}
+    
+    # Symbols with nothing stored, or stored bars not reaching back far enough, need the full period
+    full = [
+        symbol for symbol, bars in stored.items()
+        if bars is None or bars.empty or bars.index[0] > start + pd.Timedelta(days=5)
+    ]
+    incremental = [symbol for symbol in symbols if symbol not in full]
+    
+    frames = {}
+    error = None
+    batches = [(full, {'period': period})]
+    if incremental:
+        # Re-fetch the last stored bar, which may have been an unfinished session, and the
+        # completed bar before it to check that stored prices are still on the current adjustment
+        since = min(stored[symbol].index[-2 if len(stored[symbol]) > 1 else -1] for symbol in incremental)
+        batches.append((incremental, {'start': since.strftime("%Y-%m-%d")}))
+    
+    # Symbols found re-adjusted are appended as one more full-period batch while looping
+    for batch, kwargs in batches:
+        if not batch:
+            continue
+        try:
+            downloaded = download_history(batch, **kwargs)
+        except Exception as e:
+            error = e
+            downloaded = pd.DataFrame()
+        rebase = []
+        for symbol in batch:
+            if not downloaded.empty and symbol in downloaded.columns.get_level_values(1):
+                bars = downloaded.xs(symbol, axis=1, level=1).dropna(how="all")
+                if not adjustment_changed(stored[symbol], bars):
+                    # Overlapping bars replace the stored ones when appended
+                    frames[symbol] = store.append(symbol, bars)
+                elif 'period' in kwargs:
+                    # Mixing adjustment bases would show a split as a price cliff
+                    frames[symbol] = store.replace(symbol, bars)
+                else:
+                    rebase.append(symbol)
+        if rebase:
+            batches.append((rebase, {'period': period}))
+    
+    stale = [symbol for symbol in symbols if symbol not in frames and stored[symbol] is not None]
+    for symbol in stale:
+        frames[symbol] = stored[symbol]
+    
+    if not frames and error is not None:
+        raise error
+    
+    return {symbol: bars[bars.index >= start] for symbol, bars in frames.items()}, stale
+
+def load_history(symbols, period, cache, store=None):
+    """Load history from the cache, then the store, downloading only what is missing in one batch"""
+    symbols = list(dict.fromkeys(symbols))
+    frames = {symbol: cache.get((symbol, period, "history")) for symbol in symbols}
+    stale = []
+    
+    missing = [symbol for symbol, frame in frames.items() if frame is None]
+    if missing:
+        if store is not None:
+            fetched, stale = sync_history(missing, period, store)
+        else:
+            downloaded = download_history(missing, period)
+            fetched = {
+                symbol: downloaded.xs(symbol, axis=1, level=1)
+                for symbol in missing
+                if not downloaded.empty and symbol in downloaded.columns.get_level_values(1)
+            }
+        for symbol, frame in fetched.items():
+            frames[symbol] = frame
+            # Stale bars are not cached so the next request retries the download
+            if symbol not in stale:
+                cache.set((symbol, period, "history"), frame)
+    
+    frames = {symbol: frame for symbol, frame in frames.items() if frame is not None}
+    if not frames:
+        return pd.DataFrame()
+    
+    # Reassemble the wide (field, symbol) frame
+    history = pd.concat(frames, axis=1).swaplevel(axis=1)
+    history = history.reindex(columns=PRICE_FIELDS, level=0)
+    history.attrs['stale_symbols'] = stale
+    return history
+
+def report_history(history):
+    """Tell the user which symbols are shown from stored history, and return the history"""
+    if history.attrs.get('stale_symbols'):
+        st.info(f"ℹ️ Live prices unavailable, showing stored history for: {', '.join(history.attrs['stale_symbols'])}")
+    return history
+
+def submit_fetch(fn, *args):
+    """Run fn(*args) on the fetch pool; the future records when it was queued and, in its
+    `started` future, when a worker picked it up"""
+    started = Future()
+    
+    def run():
+        started.set_result(time.monotonic())
+        return fn(*args)
+    
+    future = get_fetch_pool().submit(run)
+    future.queued_at = time.monotonic()
+    future.started = started
+    return future
+
+def submit_bulk_history(symbols, period="1mo"):
+    """Start loading price history on the fetch pool and return its future"""
+    # Resolve shared resources here; worker threads have no Streamlit script context
+    return submit_fetch(load_history, symbols, period, get_market_cache(), get_history_store())
+
+def get_bulk_history(symbols, period="1mo"):
+    """Get price history for multiple stocks as one wide frame"""
     try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
-        hist = stock.history(period=period)
-        
-        # Current price
-        current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
-        
-        # Basic fundamentals
-        market_cap = info.get('marketCap', 0)
-        pe_ratio = info.get('trailingPE', 0)
-        volume = info.get('volume', 0)
-        
-        return {
-            'symbol': symbol,
-            'current_price': current_price,
-            'market_cap': market_cap,
-            'pe_ratio': pe_ratio,
-            'volume': volume,
-            'history': hist,
-            'info': info
-        }
+        return report_history(load_history(symbols, period, get_market_cache(), get_history_store()))
     except Exception as e:
-        st.error(f"Error fetching data for {symbol}: {str(e)}")
-        return None
+        st.error(f"Error fetching price history: {str(e)}")
+        return pd.DataFrame()
+
+def submit_stock_info(symbols, groups=("quote", "fundamentals")):
+    """Start fetching the field groups of each symbol on the fetch pool; returns {future: symbol}"""
+    cache = get_market_cache()
+    return {submit_fetch(fetch_stock_info, symbol, cache, groups): symbol for symbol in dict.fromkeys(symbols)}
+
+def fetch_deadline(future, timeout, queue_timeout):
+    """Monotonic time at which a future from submit_fetch is given up on"""
+    # The fetch pool is shared by every session, so time spent waiting for a worker doesn't
+    # count against a request's own timeout
+    if future.started.done():
+        return future.started.result() + timeout
+    return future.queued_at + queue_timeout
+
+def iter_completed(futures, timeout=FETCH_TIMEOUT, queue_timeout=FETCH_QUEUE_TIMEOUT):
+    """Yield (key, result, error) for each {future: key} from submit_fetch as it finishes, in completion order
+    
+    A future is given up on `timeout` seconds after a worker starts it, or after `queue_timeout`
+    seconds without a free worker (it is then cancelled); either is yielded with a timeout error.
+    """
+    pending = set(futures)
+    while pending:
+        next_deadline = min(fetch_deadline(future, timeout, queue_timeout) for future in pending)
+        # Also wake when a queued fetch starts, so its deadline moves to start + timeout
+        starting = {future.started for future in pending if not future.started.done()}
+        done, _ = wait(pending | starting, timeout=max(0, next_deadline - time.monotonic()),
+                       return_when=FIRST_COMPLETED)
+        for future in done & pending:
+            pending.discard(future)
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+        
+        now = time.monotonic()
+        for future in list(pending):
+            if now < fetch_deadline(future, timeout, queue_timeout):
+                continue
+            if future.started.done():
+                # A running fetch can't be interrupted; its result still lands in the cache
+                pending.discard(future)
+                yield futures[future], None, FutureTimeoutError("timed out")
+            elif future.cancel():
+                pending.discard(future)
+                yield futures[future], None, FutureTimeoutError("no free fetch worker")
+
+def describe_failure(symbol, error):
+    """Short failure label for warnings"""
+    reason = (str(error) or "timed out") if isinstance(error, FutureTimeoutError) else str(error)
+    return f"{symbol} ({reason})"
 
-def get_multiple_stocks(symbols, period="1mo"):
-    """Get data for multiple stocks"""
+def get_multiple_stocks(symbols, groups=("quote", "fundamentals"), timeout=FETCH_TIMEOUT):
+    """Get quotes and fundamentals for multiple stocks concurrently, keeping whatever arrives in time
+    
+    Only the requested field groups are prefetched; other fields load lazily on access.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    
     stocks_data = {}
-    for symbol in symbols:
-        data = get_stock_data(symbol, period)
-        if data:
+    failed = []
+    futures = submit_stock_info(symbols, groups)
+    for symbol, data, error in iter_completed(futures, timeout):
+        if error is None:
             stocks_data[symbol] = data
-    return stocks_data
+        else:
+            failed.append(describe_failure(symbol, error))
+    
+    # Streamlit calls must happen on the script thread, so report failures here
+    if failed:
+        st.warning(f"⚠️ Could not fetch data for: {', '.join(failed)}")
+    
+    # Keep the caller's symbol order
+    return {symbol: stocks_data[symbol] for symbol in symbols if symbol in stocks_data}
 
 def format_currency(value):
     """Format large numbers as currency"""
@@ -86,6 +537,37 @@ def format_pe_ratio(pe_ratio):
         return f"{pe_ratio:.2f}"
     return "N/A"
 
+def lttb_downsample(x, y, n_out):
+    """Pick n_out point indices with Largest-Triangle-Three-Buckets, keeping the visual shape
+    
+    The first and last points are always kept; each bucket in between keeps the point
+    forming the largest triangle with the previously kept point and the next bucket's average.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        kept[i + 1] = previous
+    return kept
+
 def get_cricket_news():
     """Get cricket news from external API"""
     try:
@@ -97,6 +579,166 @@ def get_cricket_news():
         pass
     return None
 
+# =============================================
+# 📐 ANALYTICS
+# =============================================
+
+def compute_analytics(closes, benchmark=None, window=VOLATILITY_WINDOW):
+    """Compute return and risk metrics for every column of an aligned close-price frame
+    
+    All metrics are column-wise pandas/NumPy operations, so the cost grows with the
+    frame size rather than with a Python loop per symbol.
+    """
+    closes = closes.sort_index().ffill()
+    returns = closes.pct_change().iloc[1:]
+    annualize = np.sqrt(TRADING_DAYS)
+    
+    cumulative = closes / closes.bfill().iloc[0] - 1
+    drawdown = closes / closes.cummax() - 1
+    rolling_volatility = returns.rolling(window, min_periods=max(2, window // 2)).std() * annualize
+    
+    summary = pd.DataFrame({
+        'Total Return': cumulative.iloc[-1],
+        'Annualized Volatility': returns.std() * annualize,
+        'Max Drawdown': drawdown.min(),
+    })
+    
+    if benchmark is not None:
+        market = benchmark.sort_index().ffill().pct_change().reindex(returns.index)
+        valid = market.notna()
+        aligned, market = returns[valid], market[valid]
+        # beta = cov(r, m) / var(m), computed for all columns at once
+        covariance = aligned.sub(aligned.mean()).mul(market - market.mean(), axis=0).mean()
+        summary['Beta'] = covariance / market.var(ddof=0)
+    
+    return {
+        'returns': returns,
+        'cumulative': cumulative,
+        'drawdown': drawdown,
+        'rolling_volatility': rolling_volatility,
+        'correlation': returns.corr(),
+        'summary': summary
+    }
+
+# =============================================
+# ⏱️ BACKGROUND REFRESH
+# =============================================
+
+class RefreshWriter:
+    """Cache view for the scheduler: reads always miss so data is re-fetched,
+    and writes outlive a few missed refreshes so views keep reading from the cache"""
+    
+    def __init__(self, cache, ttl_factor=3):
+        self.cache = cache
+        self.ttl_factor = ttl_factor
+    
+    def get(self, key):
+        return None
+    
+    def set(self, key, value):
+        self.cache.set(key, value, ttl=self.cache.ttls[key[2]] * self.ttl_factor)
+
+class RefreshScheduler:
+    """Daemon thread that keeps quotes, fundamentals and history of the tracked symbols warm
+    
+    Each field group is refreshed a little before its cache TTL runs out, with random
+    jitter so refreshes do not line up, and exponential backoff while Yahoo is failing.
+    Upstream traffic depends only on the tracked universe, not on how many users are connected.
+    """
+    
+    def __init__(self, symbols, cache, store, periods=REFRESH_PERIODS):
+        self.symbols = list(symbols)
+        self.store = store
+        self.periods = [period for period in periods if period in PERIOD_DAYS]
+        self.last_refresh = {}  # task name -> wall-clock time of last success
+        self.failures = {}  # task name -> consecutive failures
+        self.last_error = None
+        self._writer = RefreshWriter(cache)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="market-refresh", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _tasks(self):
+        """(name, interval seconds, refresh function) for every field group"""
+        tasks = [
+            ("quote", CACHE_TTLS["quote"], lambda: self._refresh_group("quote")),
+            ("fundamentals", CACHE_TTLS["fundamentals"], lambda: self._refresh_group("fundamentals")),
+        ]
+        if self.periods:
+            tasks.append(("history", CACHE_TTLS["history"], self._refresh_history))
+        return [(name, ttl * REFRESH_FRACTION, refresh) for name, ttl, refresh in tasks]
+    
+    def _refresh_group(self, group):
+        """Re-fetch one field group for every tracked symbol, one request at a time"""
+        errors = []
+        for symbol in self.symbols:
+            if self._stop.is_set():
+                return
+            try:
+                StockFundamentals(symbol, self._writer).load(group)
+            except Exception as e:
+                errors.append(e)
+        if errors and len(errors) == len(self.symbols):
+            raise errors[-1]
+    
+    def _refresh_history(self):
+        """Download the longest period once, then cache every shorter period as a slice of it"""
+        longest = max(self.periods, key=PERIOD_DAYS.get)
+        history = load_history(self.symbols + [BENCHMARK_SYMBOL], longest, self._writer, self.store)
+        if history.empty:
+            raise RuntimeError("no price history returned")
+        stale = set(history.attrs.get('stale_symbols', []))
+        fresh = [symbol for symbol in history.columns.get_level_values(1).unique() if symbol not in stale]
+        if not fresh:
+            raise RuntimeError("no fresh price history returned")
+        
+        for period in self.periods:
+            window = history[history.index >= period_start(period)]
+            for symbol in fresh:
+                self._writer.set((symbol, period, "history"), window.xs(symbol, axis=1, level=1).dropna(how="all"))
+    
+    def _run(self):
+        tasks = self._tasks()
+        next_run = {name: 0 for name, _, _ in tasks}
+        while not self._stop.is_set():
+            for name, interval, refresh in tasks:
+                if next_run[name] > time.monotonic():
+                    continue
+                try:
+                    refresh()
+                    self.failures[name] = 0
+                    self.last_refresh[name] = time.time()
+                    delay = interval
+                except Exception as e:
+                    self.failures[name] = self.failures.get(name, 0) + 1
+                    self.last_error = f"{name}: {str(e)}"
+                    delay = min(REFRESH_MAX_BACKOFF, 5 * 2 ** self.failures[name])
+                next_run[name] = time.monotonic() + delay * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+            self._stop.wait(max(1.0, min(next_run.values()) - time.monotonic()))
+    
+    def status(self):
+        """Seconds since the last successful quote refresh, and whether any task is backing off"""
+        last_quote = self.last_refresh.get("quote")
+        return {
+            'quote_age': time.time() - last_quote if last_quote else None,
+            'backing_off': any(self.failures.values()),
+            'last_error': self.last_error
+        }
+
+@st.cache_resource
+def get_refresh_scheduler():
+    """Start the process-wide background refresh thread, or return None when disabled"""
+    if not BACKGROUND_REFRESH:
+        return None
+    symbols = COMPANY_REGISTRY.symbols()[:REFRESH_MAX_SYMBOLS]
+    return RefreshScheduler(symbols, get_market_cache(), get_history_store()).start()
+
 # =============================================
 # 🎨 STREAMLIT UI CONFIGURATION
 # =============================================
@@ -232,7 +874,22 @@ def main():
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 🔑 System Status")
     st.sidebar.success("✅ All Systems Operational")
-    st.sidebar.info("📊 Real-time Data Available")
+    scheduler = get_refresh_scheduler()
+    if scheduler is None:
+        st.sidebar.info("📊 Real-time Data Available")
+    else:
+        refresh_status = scheduler.status()
+        if refresh_status['backing_off']:
+            st.sidebar.warning(f"⚠️ Background refresh retrying ({refresh_status['last_error']})")
+        elif refresh_status['quote_age'] is not None:
+            st.sidebar.info(f"📊 Prices refreshed {refresh_status['quote_age']:.0f}s ago")
+        else:
+            st.sidebar.info("📊 Warming up market data...")
+    cache_stats = get_market_cache().stats()
+    st.sidebar.caption(
+        f"🗄️ Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+        f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries)"
+    )
 
     # Dashboard Overview
     if app_mode == "🏠 Dashboard Overview":
@@ -265,11 +922,11 @@ def show_dashboard_overview():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown("""
+        st.markdown(f"""
         <div class="metric-card">
             <h3>📈 Stock Analysis</h3>
             <p>Real-time stock data and fundamentals</p>
-            <h2>15+</h2>
+            <h2>{len(COMPANY_REGISTRY)}</h2>
             <p>Companies Tracked</p>
         </div>
         """, unsafe_allow_html=True)
@@ -347,7 +1004,7 @@ def show_stock_analysis():
     with col1:
         selected_companies = st.multiselect(
             "🔍 Select companies to analyze:",
-            options=list(COMPANY_SYMBOLS.keys()),
+            options=COMPANY_REGISTRY.names(),
             default=["Apple", "Microsoft", "Google"],
             help="Choose one or more companies for analysis"
         )
@@ -360,32 +1017,57 @@ def show_stock_analysis():
         )
     
     if selected_companies:
-        symbols = [COMPANY_SYMBOLS[company] for company in selected_companies]
+        symbols = [COMPANY_REGISTRY.symbol_for(company) for company in selected_companies]
+        
+        companies = dict(zip(symbols, selected_companies))
+        
+        # Lay out placeholders first so each part renders as soon as its data arrives
+        st.markdown("### 📊 Stock Performance")
+        card_slots = {symbol: col.empty() for symbol, col in zip(symbols, st.columns(len(symbols)))}
+        for symbol, slot in card_slots.items():
+            slot.info(f"🔄 Fetching {companies[symbol]}...")
+        
+        st.markdown("### 📈 Price Comparison")
+        chart_slot = st.empty()
+        chart_slot.info("🔄 Fetching price history...")
+        
+        st.markdown("### 📋 Fundamentals Comparison")
+        table_slot = st.empty()
         
-        with st.spinner("🔄 Fetching stock data..."):
-            stocks_data = get_multiple_stocks(symbols, analysis_period)
+        # Quotes and the bulk history download run concurrently on the fetch pool
+        futures = submit_stock_info(symbols)
+        futures[submit_bulk_history(symbols, analysis_period)] = HISTORY_KEY
+        
+        stocks_data = {}
+        history = None
+        failed = []
+        for key, result, error in iter_completed(futures):
+            if key == HISTORY_KEY:
+                if error is None:
+                    history = report_history(result)
+                    chart_slot.plotly_chart(create_price_chart(history), use_container_width=True)
+                else:
+                    chart_slot.error(f"Error fetching price history: {str(error)}")
+            elif error is None:
+                stocks_data[key] = result
+                with card_slots[key].container():
+                    display_stock_card(companies[key], result)
+            else:
+                failed.append(describe_failure(key, error))
+                card_slots[key].warning(f"⚠️ No data for {companies[key]}")
             
+            # Redraw the table with every symbol that has arrived so far
             if stocks_data:
-                # Display individual stock cards
-                st.markdown("### 📊 Stock Performance")
-                cols = st.columns(len(selected_companies))
-                
-                for idx, (company, symbol) in enumerate(zip(selected_companies, symbols)):
-                    if symbol in stocks_data:
-                        data = stocks_data[symbol]
-                        with cols[idx]:
-                            display_stock_card(company, data)
-                
-                # Price chart
-                st.markdown("### 📈 Price Comparison")
-                fig = create_price_chart(stocks_data)
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Fundamentals table
-                st.markdown("### 📋 Fundamentals Comparison")
-                display_fundamentals_table(stocks_data)
-            else:
-                st.error("❌ Failed to fetch stock data. Please try again.")
+                with table_slot.container():
+                    display_fundamentals_table(
+                        {symbol: stocks_data[symbol] for symbol in symbols if symbol in stocks_data},
+                        history
+                    )
+        
+        if failed:
+            st.warning(f"⚠️ Could not fetch data for: {', '.join(failed)}")
+        if not stocks_data:
+            table_slot.error("❌ Failed to fetch stock data. Please try again.")
 
 def display_stock_card(company, data):
     """Display a beautiful stock card"""
@@ -405,17 +1087,28 @@ def display_stock_card(company, data):
     </div>
     """, unsafe_allow_html=True)
 
-def create_price_chart(stocks_data):
-    """Create a price comparison chart"""
+def create_price_chart(history):
+    """Create a price comparison chart from a wide (field, symbol) history frame"""
     fig = go.Figure()
     
-    for symbol, data in stocks_data.items():
-        if data['history'] is not None and not data['history'].empty:
-            company_name = [k for k, v in COMPANY_SYMBOLS.items() if v == symbol][0]
-            fig.add_trace(go.Scatter(
-                x=data['history'].index,
-                y=data['history']['Close'],
-                name=company_name,
+    if history is not None and not history.empty:
+        closes = history['Close']
+        # WebGL traces render large point counts far faster than SVG
+        trace_type = go.Scattergl if closes.count().sum() > WEBGL_POINT_THRESHOLD else go.Scatter
+        
+        for symbol in closes.columns:
+            series = closes[symbol].dropna()
+            if len(series) > CHART_POINT_BUDGET:
+                if pd.api.types.is_datetime64_any_dtype(series.index):
+                    x = series.index.to_numpy().astype("int64")
+                else:
+                    x = np.arange(len(series))
+                series = series.iloc[lttb_downsample(x, series.to_numpy(), CHART_POINT_BUDGET)]
+            
+            fig.add_trace(trace_type(
+                x=series.index,
+                y=series.to_numpy(),
+                name=COMPANY_REGISTRY.name_for(symbol),
                 line=dict(width=3)
             ))
     
@@ -430,20 +1123,32 @@ def create_price_chart(stocks_data):
     
     return fig
 
-def display_fundamentals_table(stocks_data):
-    """Display fundamentals in a table"""
+def display_fundamentals_table(stocks_data, history=None):
+    """Display fundamentals in a table, with period returns when history is given"""
+    period_returns = {}
+    last_volumes = {}
+    if history is not None and not history.empty:
+        # One vectorized pass over all symbols in the wide frame
+        closes = history['Close']
+        period_returns = ((closes.ffill().iloc[-1] / closes.bfill().iloc[0] - 1) * 100).to_dict()
+        last_volumes = history['Volume'].ffill().iloc[-1].to_dict()
+    
     fundamentals_data = []
     
     for symbol, data in stocks_data.items():
-        company_name = [k for k, v in COMPANY_SYMBOLS.items() if v == symbol][0]
-        fundamentals_data.append({
-            'Company': company_name,
+        volume = data['volume'] or last_volumes.get(symbol)
+        row = {
+            'Company': COMPANY_REGISTRY.name_for(symbol),
             'Symbol': symbol,
             'Current Price': f"${data['current_price']:,.2f}" if data['current_price'] else 'N/A',
             'Market Cap': format_currency(data['market_cap']),
             'P/E Ratio': format_pe_ratio(data['pe_ratio']),
-            'Volume': f"{data['volume']:,}" if data['volume'] else 'N/A'
-        })
+            'Volume': f"{int(volume):,}" if volume and not pd.isna(volume) else 'N/A'
+        }
+        if period_returns:
+            period_return = period_returns.get(symbol)
+            row['Period Return'] = f"{period_return:+.2f}%" if period_return is not None and not pd.isna(period_return) else 'N/A'
+        fundamentals_data.append(row)
     
     df = pd.DataFrame(fundamentals_data)
     st.dataframe(df, use_container_width=True, hide_index=True)
@@ -458,8 +1163,8 @@ def show_stock_comparison():
     col1, col2 = st.columns(2)
     
     with col1:
-        company1 = st.selectbox("Select First Company:", list(COMPANY_SYMBOLS.keys()), index=0)
-        company2 = st.selectbox("Select Second Company:", list(COMPANY_SYMBOLS.keys()), index=1)
+        company1 = st.selectbox("Select First Company:", COMPANY_REGISTRY.names(), index=0)
+        company2 = st.selectbox("Select Second Company:", COMPANY_REGISTRY.names(), index=1)
     
     with col2:
         comparison_type = st.selectbox("Comparison Type:", ["Price Performance", "Fundamentals", "Volatility"])
@@ -467,16 +1172,22 @@ def show_stock_comparison():
     
     if st.button("🔍 Compare Stocks", use_container_width=True):
         with st.spinner("Comparing stocks..."):
-            symbol1 = COMPANY_SYMBOLS[company1]
-            symbol2 = COMPANY_SYMBOLS[company2]
+            symbol1 = COMPANY_REGISTRY.symbol_for(company1)
+            symbol2 = COMPANY_REGISTRY.symbol_for(company2)
+            
+            stocks_data = get_multiple_stocks([symbol1, symbol2])
+            data1 = stocks_data.get(symbol1)
+            data2 = stocks_data.get(symbol2)
             
-            data1 = get_stock_data(symbol1, period)
-            data2 = get_stock_data(symbol2, period)
+            # Performance and volatility need aligned history, with the benchmark for beta
+            history = None
+            if comparison_type != "Fundamentals":
+                history = get_bulk_history([symbol1, symbol2, BENCHMARK_SYMBOL], period)
             
             if data1 and data2:
-                display_comparison_results(company1, data1, company2, data2, comparison_type)
+                display_comparison_results(company1, data1, company2, data2, comparison_type, history)
 
-def display_comparison_results(company1, data1, company2, data2, comparison_type):
+def display_comparison_results(company1, data1, company2, data2, comparison_type, history=None):
     """Display comparison results"""
     st.markdown("### 📊 Comparison Results")
     
@@ -504,6 +1215,18 @@ def display_comparison_results(company1, data1, company2, data2, comparison_type
         </div>
         """, unsafe_allow_html=True)
     
+    if comparison_type != "Fundamentals" and history is not None and not history.empty:
+        names = {data1['symbol']: company1, data2['symbol']: company2, BENCHMARK_SYMBOL: BENCHMARK_NAME}
+        closes = history['Close'].rename(columns=names)
+        benchmark = closes.pop(BENCHMARK_NAME) if BENCHMARK_NAME in closes.columns else None
+        analytics = compute_analytics(closes, benchmark)
+        
+        if comparison_type == "Price Performance":
+            display_performance_analytics(analytics)
+        else:
+            display_volatility_analytics(analytics)
+        return
+    
     # Add comparison insights
     st.markdown("### 📈 Comparison Insights")
     
@@ -529,6 +1252,79 @@ def display_comparison_results(company1, data1, company2, data2, comparison_type
                     delta=f"{company1} vs {company2}"
                 )
 
+def display_performance_analytics(analytics):
+    """Display cumulative returns and drawdowns"""
+    st.markdown("### 📈 Price Performance")
+    
+    fig = px.line(analytics['cumulative'] * 100)
+    fig.update_layout(
+        title="Cumulative Return",
+        xaxis_title="Date",
+        yaxis_title="Return (%)",
+        legend_title="Company",
+        template="plotly_white",
+        height=450
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    cols = st.columns(len(analytics['summary']))
+    for col, (company, row) in zip(cols, analytics['summary'].iterrows()):
+        with col:
+            st.metric(
+                label=f"{company} Return",
+                value=f"{row['Total Return']:+.2%}",
+                delta=f"Max drawdown {row['Max Drawdown']:.2%}",
+                delta_color="off"
+            )
+    
+    fig = px.area(analytics['drawdown'] * 100)
+    fig.update_layout(
+        title="Drawdown from Peak",
+        xaxis_title="Date",
+        yaxis_title="Drawdown (%)",
+        legend_title="Company",
+        template="plotly_white",
+        height=350
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def display_volatility_analytics(analytics):
+    """Display rolling volatility, beta and the return correlation matrix"""
+    st.markdown("### 🌪️ Volatility")
+    
+    fig = px.line(analytics['rolling_volatility'] * 100)
+    fig.update_layout(
+        title=f"Rolling {VOLATILITY_WINDOW}-Day Annualized Volatility",
+        xaxis_title="Date",
+        yaxis_title="Volatility (%)",
+        legend_title="Company",
+        template="plotly_white",
+        height=450
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    cols = st.columns(len(analytics['summary']))
+    for col, (company, row) in zip(cols, analytics['summary'].iterrows()):
+        with col:
+            beta = row.get('Beta')
+            st.metric(
+                label=f"{company} Volatility",
+                value=f"{row['Annualized Volatility']:.2%}",
+                delta=f"Beta vs {BENCHMARK_NAME}: {beta:.2f}" if beta is not None and not pd.isna(beta) else None,
+                delta_color="off"
+            )
+    
+    fig = px.imshow(
+        analytics['correlation'],
+        text_auto=".2f",
+        zmin=-1,
+        zmax=1,
+        color_continuous_scale="RdBu",
+        title="Daily Return Correlation"
+    )
+    fig.update_layout(template="plotly_white", height=400)
+    st.plotly_chart(fig, use_container_width=True)
+
 # =============================================
 # 🏏 CRICKET UPDATES SECTION
 # =============================================
@@ -623,12 +1419,13 @@ def show_about():
 def show_tech_stocks_overview():
     st.markdown("### 💻 Tech Stocks Overview")
     tech_companies = ["Apple", "Microsoft", "Google", "Amazon", "Nvidia"]
-    symbols = [COMPANY_SYMBOLS[company] for company in tech_companies]
+    symbols = [COMPANY_REGISTRY.symbol_for(company) for company in tech_companies]
     
     with st.spinner("Fetching tech stocks data..."):
-        stocks_data = get_multiple_stocks(symbols, "1mo")
+        stocks_data = get_multiple_stocks(symbols)
+        history = get_bulk_history(symbols, "1mo")
         if stocks_data:
-            display_fundamentals_table(stocks_data)
+            display_fundamentals_table(stocks_data, history)
 
 def show_market_overview():
     st.markdown("### 🌎 Market Overview")
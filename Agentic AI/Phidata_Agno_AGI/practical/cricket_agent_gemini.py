@@ -1,15 +1,21 @@
 from phi.agent import Agent, RunResponse
 from phi.tools.duckduckgo import DuckDuckGo
-from phi.model.google import Gemini
 from dotenv import load_dotenv
 import os
 
+from model_registry import get_model, registry
+from team_orchestrator import TeamOrchestrator
+from tool_cache import cache_tools
+
 # Load API keys
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
 
+# Every agent gets its own model object, all sharing one pooled Gemini client
+GEMINI_MODEL = "gemini-2.5-flash-lite-preview-06-17"
+
 agent = Agent(
-    model=Gemini(id="gemini-2.5-flash-lite-preview-06-17"),
+    model=get_model("gemini", GEMINI_MODEL, api_key=api_key),
     markdown=True,
 )
 
@@ -24,8 +30,8 @@ agent = Agent(
 # ✅ Live Cricket Match Agent
 match_agent = Agent(
     name="Live Match Agent",
-    model=Gemini(id="gemini-2.5-flash-lite-preview-06-17"),  # Using OpenAI GPT-4o
-    tools=[DuckDuckGo()],
+    model=get_model("gemini", GEMINI_MODEL, api_key=api_key),  # Using OpenAI GPT-4o
+    tools=[cache_tools(DuckDuckGo(), ttl=30)],  # live scores go stale in seconds
     instructions=[
         "Search for live cricket match scores.",
         "Summarize the score, top players, and match situation.",
@@ -39,8 +45,8 @@ match_agent = Agent(
 # ✅ Player Stats Agent
 player_agent = Agent(
     name="Player Stats Agent",
-    model=Gemini(id="gemini-2.5-flash-lite-preview-06-17"),
-    tools=[DuckDuckGo()],
+    model=get_model("gemini", GEMINI_MODEL, api_key=api_key),
+    tools=[cache_tools(DuckDuckGo(), ttl=60 * 60)],  # stats only change after a match
     instructions=[
         "Find recent cricket player statistics.",
         "Include batting and bowling stats for the last 5 matches.",
@@ -54,8 +60,8 @@ player_agent = Agent(
 # ✅ Cricket News Agent
 news_agent = Agent(
     name="Cricket News Agent",
-    model=Gemini(id="gemini-2.5-flash-lite-preview-06-17"),
-    tools=[DuckDuckGo()],
+    model=get_model("gemini", GEMINI_MODEL, api_key=api_key),
+    tools=[cache_tools(DuckDuckGo())],  # default news/search freshness
     instructions=[
         "Find and summarize the latest cricket news.",
         "Highlight upcoming matches, injuries, and tournament updates.",
@@ -69,7 +75,7 @@ news_agent = Agent(
 # ✅ Main Cricket Team (Combining all agents)
 cricket_team = Agent(
     name="Cricket Analysis Team",
-    model=Gemini(id="gemini-2.5-flash-lite-preview-06-17"),
+    model=get_model("gemini", GEMINI_MODEL, api_key=api_key),
     team=[match_agent, player_agent, news_agent],
     instructions=[
         "Provide live match scores, player statistics, and news updates.",
@@ -81,7 +87,10 @@ cricket_team = Agent(
 )
 
 # ✅ Run Query to Fetch Cricket Data
-cricket_team.print_response(
+# The score, player stats and news lookups are independent, so the orchestrator runs the
+# three members at the same time and the team leader only writes the final summary
+TeamOrchestrator(cricket_team).print_response(
     "Get the latest score of the India vs Australia match, recent stats for Virat Kohli, and cricket news.", 
     stream=True
 )
+registry.log_stats()
@@ -1,9 +1,12 @@
 import streamlit as st
 from phi.agent import Agent
-from phi.model.groq import Groq
 from phi.tools.yfinance import YFinanceTools
 from dotenv import load_dotenv
 import os
+from model_registry import get_model
+from response_cache import SemanticCache
+from symbol_registry import load_registry
+from tool_cache import cache_tools
 
 # Load API keys
 load_dotenv()
@@ -12,21 +15,17 @@ groq_api_key = os.getenv("GROQ_API_KEY")  # Ensure API key is set in your .env
 # 🎯 Function to get stock symbols
 def get_company_symbol(company: str) -> str:
     """Convert company name to stock symbol."""
-    symbols = {
-        "Infosys": "INFY",
-        "Tesla": "TSLA",
-        "Apple": "AAPL",
-        "Microsoft": "MSFT",
-        "Amazon": "AMZN",
-        "Google": "GOOGL",
-    }
-    return symbols.get(company, "Unknown")
+    return load_registry().symbol_for(company) or "Unknown"
+
+# Both agents share one pooled Groq client, which also survives Streamlit reruns
+# because the registry lives in an imported module
 
 # 🎯 Stock Data Agent
 stock_agent = Agent(
     name="Stock Data Agent",
-    model=Groq(id="llama-3.3-70b-versatile", api_key=groq_api_key),
-    tools=[YFinanceTools(stock_price=True, analyst_recommendations=True, stock_fundamentals=True)],
+    model=get_model("groq", "llama-3.3-70b-versatile", api_key=groq_api_key),
+    # Prices stay cached for a minute, recommendations and fundamentals for hours (see tool_cache.TOOL_TTLS)
+    tools=[cache_tools(YFinanceTools(stock_price=True, analyst_recommendations=True, stock_fundamentals=True))],
     instructions=["Use tables to display stock data."],
     show_tool_calls=True,
     markdown=True,
@@ -36,7 +35,7 @@ stock_agent = Agent(
 # 🎯 Main Finance Analysis Team
 agent_team = Agent(
     name="Finance Analysis Team",
-    model=Groq(id="llama-3.3-70b-versatile", api_key=groq_api_key),
+    model=get_model("groq", "llama-3.3-70b-versatile", api_key=groq_api_key),
     team=[stock_agent],
     instructions=["Use tables for comparisons and include analyst insights."],
     show_tool_calls=True,
@@ -44,6 +43,11 @@ agent_team = Agent(
     debug_mode=True,
 )
 
+# 🎯 Answers to repeated (or reworded) comparisons, shared by every user of this server
+@st.cache_resource
+def get_response_cache() -> SemanticCache:
+    return SemanticCache()
+
 # 🎯 Streamlit UI
 st.set_page_config(page_title="📈 Financial Insights", layout="wide")
 st.title("📈 Financial AI - Stock Prices, Analyst Ratings & Fundamentals")
@@ -67,8 +71,16 @@ if st.button("Get Stock Analysis"):
                     query += f" and {symbol_2}"
                 query += ". Show in tables."
 
-                response = agent_team.run(query)  # ✅ FIXED: Using `.run()`
-                st.markdown(response)  # ✅ Display result properly
+                response_cache = get_response_cache()
+                cached = response_cache.get(query)
+                if cached:
+                    st.markdown(cached.content)
+                    st.caption(f"⚡ Cached answer ({cached.similarity:.0%} match, {cached.age / 60:.0f} min old)")
+                else:
+                    response = agent_team.run(query)  # ✅ FIXED: Using `.run()`
+                    if response.content:
+                        response_cache.put(query, response.content)
+                    st.markdown(response.content)  # ✅ Display result properly
         else:
             st.warning(f"Company '{company_1}' not found. Please try another.")
 
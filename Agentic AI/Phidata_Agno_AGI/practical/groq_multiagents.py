@@ -4,6 +4,7 @@ from phi.agent import Agent
 from phi.model.groq import Groq
 from phi.tools.yfinance import YFinanceTools
 from dotenv import load_dotenv
+from symbol_registry import load_registry
 
 load_dotenv()
 
@@ -17,16 +18,7 @@ def get_company_symbol(company: str) -> str:
     Returns:
         str: The symbol for the company.
     """
-    symbols = {
-        "Phidata": "MSFT",
-        "Infosys": "INFY",
-        "Tesla": "TSLA",
-        "Apple": "AAPL",
-        "Microsoft": "MSFT",
-        "Amazon": "AMZN",
-        "Google": "GOOGL",
-    }
-    return symbols.get(company, "Unknown")
+    return load_registry().symbol_for(company) or "Unknown"
 
 
 agent = Agent(
@@ -0,0 +1,135 @@
+"""Run independent (agent, prompt) jobs for phi agents concurrently.
+
+Each job streams into its own buffer (and optionally its own file), and finished
+answers are printed as whole labeled panels, so output from different agents never
+interleaves. Running N unrelated agents takes about as long as the slowest one.
+"""
+
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+
+
+@dataclass
+class Job:
+    agent: object
+    prompt: str
+    label: str = None
+
+
+@dataclass
+class JobResult:
+    label: str
+    content: str = ""
+    seconds: float = 0.0
+    error: str = None
+    output_file: str = None
+
+
+def _slug(label):
+    return re.sub(r"[^a-z0-9]+", "_", label.lower()).strip("_") or "job"
+
+
+class JobRunner:
+    """Runs jobs on a thread pool with at most `per_agent_limit` concurrent runs per agent."""
+
+    def __init__(self, max_workers=None, per_agent_limit=1, output_dir=None, console=None):
+        self.max_workers = max_workers
+        self.per_agent_limit = per_agent_limit
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.console = console or Console(file=sys.stdout)
+        self._print_lock = threading.Lock()
+
+    def _prepare(self, jobs):
+        """Give each job an agent it can run without racing other jobs.
+
+        phi adds an agent's tools to its model on every run, so agents that share a model
+        object (or one agent with several jobs) get private copies of agent and model.
+        """
+        model_users = {}
+        for job in jobs:
+            model_users.setdefault(id(job.agent.model), set()).add(id(job.agent))
+        jobs_per_agent = {}
+        for job in jobs:
+            jobs_per_agent[id(job.agent)] = jobs_per_agent.get(id(job.agent), 0) + 1
+
+        prepared = []
+        labels = {}
+        for job in jobs:
+            shared_model = job.agent.model is not None and len(model_users[id(job.agent.model)]) > 1
+            agent = job.agent.deep_copy() if shared_model or jobs_per_agent[id(job.agent)] > 1 else job.agent
+            label = job.label or job.agent.name or f"Job {len(prepared) + 1}"
+            # Repeated labels get a counter so every job keeps its own channel and file
+            labels[label] = labels.get(label, 0) + 1
+            if labels[label] > 1:
+                label = f"{label} #{labels[label]}"
+            # Limits are per original agent, whichever copy runs
+            prepared.append((id(job.agent), agent, job.prompt, label))
+        return prepared
+
+    def _run_one(self, agent, prompt, label, semaphore):
+        result = JobResult(label=label)
+        output = None
+        if self.output_dir:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            result.output_file = str(self.output_dir / f"{_slug(label)}.md")
+            output = open(result.output_file, "w", encoding="utf-8")
+        chunks = []
+        with semaphore:
+            started = time.perf_counter()
+            try:
+                for chunk in agent.run(prompt, stream=True):
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        if output:
+                            output.write(chunk.content)
+                            output.flush()
+            except Exception as e:
+                result.error = str(e)
+            finally:
+                result.seconds = time.perf_counter() - started
+                if output:
+                    output.close()
+        result.content = "".join(chunks)
+        self._print(result)
+        return result
+
+    def _print(self, result):
+        if result.error:
+            body = f"**Failed:** {result.error}"
+            style = "red"
+        else:
+            body = result.content
+            style = "blue"
+        title = f"{result.label} ({result.seconds:.1f}s)"
+        with self._print_lock:
+            self.console.print(Panel(Markdown(body), title=title, title_align="left", border_style=style))
+
+    def run(self, jobs):
+        """Run all jobs; returns JobResults in job order once every job has finished."""
+        jobs = [job if isinstance(job, Job) else Job(*job) for job in jobs]
+        prepared = self._prepare(jobs)
+        semaphores = {
+            agent_key: threading.BoundedSemaphore(self.per_agent_limit) for agent_key, _, _, _ in prepared
+        }
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(prepared) or 1, thread_name_prefix="agent") as pool:
+            futures = [
+                pool.submit(self._run_one, agent, prompt, label, semaphores[agent_key])
+                for agent_key, agent, prompt, label in prepared
+            ]
+            results = [future.result() for future in futures]
+        slowest = max((r.seconds for r in results), default=0)
+        self.console.print(
+            f"[bold]{len(results)} jobs finished in {time.perf_counter() - started:.1f}s "
+            f"(slowest {slowest:.1f}s, {sum(r.seconds for r in results):.1f}s if run one after another)[/bold]"
+        )
+        return results
@@ -0,0 +1,251 @@
+"""Process-wide registry of pooled, keep-alive model clients for phi agents.
+
+phi's `Groq` model builds a new SDK client (and HTTP connection pool) on every call
+unless one is passed in, and `Gemini` re-runs `genai.configure`, which drops the cached
+gRPC channel. `get_model()` instead hands every agent its own model object (phi adds
+an agent's tools to its model, so models must not be shared) backed by one client per
+(provider, model id, key), so new agents are cheap and concurrent agents reuse warm
+connections instead of redoing TLS setup.
+
+    from model_registry import get_model, registry
+    agent = Agent(model=get_model("groq", "llama-3.3-70b-versatile"), ...)
+    print(registry.stats())
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+
+import httpx
+from phi.utils.log import logger
+
+# Connections kept per pooled client; idle ones are closed after the expiry
+POOL_MAX_CONNECTIONS = int(os.getenv("MODEL_POOL_MAX_CONNECTIONS", "100"))
+POOL_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MODEL_POOL_MAX_KEEPALIVE", "20"))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("MODEL_POOL_KEEPALIVE_SECONDS", "60"))
+
+# Environment variable each provider's SDK falls back to when no key is passed
+API_KEY_ENV = {"groq": "GROQ_API_KEY", "gemini": "GOOGLE_API_KEY"}
+
+
+@dataclass
+class PoolStats:
+    provider: str
+    model_id: str
+    models: int = 0  # model objects handed out
+    clients: int = 0  # clients created (sync, plus one async client per event loop)
+    requests: int = 0
+    open_connections: int = 0
+    idle_connections: int = 0
+    created: float = field(default_factory=time.time)
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def _connections(http_client):
+    """(open, idle) connections of an httpx client's pool; (0, 0) if httpx hides them."""
+    pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    return len(connections), sum(1 for c in connections if c.is_idle())
+
+
+class ModelRegistry:
+    """Hands out phi models that share one pooled client per (provider, model id, key)."""
+
+    def __init__(self):
+        # Reentrant: client factories register their HTTP clients while the lock is held
+        self._lock = threading.RLock()
+        self._stats = {}  # pool key -> PoolStats
+        self._clients = {}  # pool key -> sync client
+        self._http_clients = {}  # pool key -> httpx clients to report on
+        self._async_clients = {}  # pool key -> {event loop: async client}
+
+    @staticmethod
+    def pool_key(provider, model_id, api_key=None):
+        provider = provider.lower()
+        return provider, model_id, api_key or os.getenv(API_KEY_ENV.get(provider, ""))
+
+    def model(self, provider, model_id, api_key=None, **params):
+        """A new phi model object for one agent, backed by the shared client for its pool."""
+        provider = provider.lower()
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown provider {provider!r}, expected one of {sorted(PROVIDERS)}")
+        model = model_class(provider)(id=model_id, api_key=api_key, **params)
+        with self._lock:
+            self._stats_for(self.pool_key(provider, model_id, api_key)).models += 1
+        return model
+
+    def _stats_for(self, key):
+        if key not in self._stats:
+            self._stats[key] = PoolStats(provider=key[0], model_id=key[1])
+        return self._stats[key]
+
+    def _count_request(self, key):
+        with self._lock:
+            self._stats_for(key).requests += 1
+
+    def sync_client(self, key, factory):
+        """The pool's client, created by `factory(on_request)` on first use."""
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = factory(lambda *_: self._count_request(key))
+                self._stats_for(key).clients += 1
+                logger.debug(f"Created pooled {key[0]} client for {key[1]}")
+            return self._clients[key]
+
+    def async_client(self, key, factory):
+        """The pool's async client for the running event loop.
+
+        Async connections belong to the loop that opened them, so each loop (one per
+        `asyncio.run`) gets its own client; clients of closed loops are dropped.
+        """
+        loop = asyncio.get_running_loop()
+
+        async def on_request(*_):
+            self._count_request(key)
+
+        with self._lock:
+            per_loop = self._async_clients.setdefault(key, {})
+            for closed in [old for old in per_loop if old.is_closed()]:
+                del per_loop[closed]
+            if loop not in per_loop:
+                per_loop[loop] = factory(on_request)
+                self._stats_for(key).clients += 1
+            return per_loop[loop]
+
+    def track_http_client(self, key, http_client):
+        with self._lock:
+            self._http_clients.setdefault(key, weakref.WeakSet()).add(http_client)
+
+    def stats(self):
+        """Pool stats per "provider/model id" (keys are not included)."""
+        with self._lock:
+            report = {}
+            for key, stats in self._stats.items():
+                open_total = idle_total = 0
+                for http_client in self._http_clients.get(key, ()):
+                    opened, idle = _connections(http_client)
+                    open_total += opened
+                    idle_total += idle
+                stats.open_connections, stats.idle_connections = open_total, idle_total
+                name = f"{stats.provider}/{stats.model_id}"
+                # Same model with different keys: keep each pool apart
+                while name in report:
+                    name += "'"
+                report[name] = asdict(stats)
+            return report
+
+    def log_stats(self):
+        for name, stats in self.stats().items():
+            logger.info(
+                f"{name}: {stats['models']} models, {stats['clients']} clients, {stats['requests']} requests, "
+                f"{stats['open_connections']} open / {stats['idle_connections']} idle connections"
+            )
+
+    def close(self):
+        """Close every pooled sync client (async clients go with their event loop)."""
+        with self._lock:
+            for client in self._clients.values():
+                close = getattr(client, "close", None)
+                if close:
+                    close()
+            self._clients.clear()
+
+
+registry = ModelRegistry()
+
+
+def get_model(provider, model_id, api_key=None, **params):
+    """Shortcut for `registry.model(...)`."""
+    return registry.model(provider, model_id, api_key=api_key, **params)
+
+
+# =============================================
+# 🔌 PROVIDERS
+# =============================================
+def _pooled_groq():
+    from groq import AsyncGroq as AsyncGroqClient, Groq as GroqClient
+    from phi.model.groq import Groq
+
+    class PooledGroq(Groq):
+        """phi Groq model whose SDK clients come from the registry instead of one per call."""
+
+        def _key(self):
+            return registry.pool_key("groq", self.id, self.api_key)
+
+        def get_client(self):
+            if self.client:
+                return self.client
+            key = self._key()
+
+            def factory(on_request):
+                http_client = httpx.Client(limits=_limits(), event_hooks={"request": [on_request]})
+                registry.track_http_client(key, http_client)
+                return GroqClient(**self.get_client_params(), http_client=http_client)
+
+            return registry.sync_client(key, factory)
+
+        def get_async_client(self):
+            if self.async_client:
+                return self.async_client
+            key = self._key()
+
+            def factory(on_request):
+                http_client = httpx.AsyncClient(limits=_limits(), event_hooks={"request": [on_request]})
+                registry.track_http_client(key, http_client)
+                return AsyncGroqClient(**self.get_client_params(), http_client=http_client)
+
+            return registry.async_client(key, factory)
+
+    return PooledGroq
+
+
+def _pooled_gemini():
+    import google.generativeai as genai
+    from google.generativeai.client import _ClientManager
+    from phi.model.google import Gemini
+
+    class PooledGemini(Gemini):
+        """phi Gemini model sharing one gRPC client per key instead of reconfiguring genai per call.
+
+        The GenerativeModel itself is still built per call because the agent's tools are
+        baked into it; only the underlying service client is shared.
+        """
+
+        def get_client(self):
+            if self.client:
+                return self.client
+            key = registry.pool_key("gemini", self.id, self.api_key)
+
+            def factory(on_request):
+                # A private client manager keeps keys apart, unlike the global genai.configure
+                manager = _ClientManager()
+                manager.configure(api_key=key[2], **(self.client_params or {}))
+                return manager.get_default_client("generative")
+
+            service_client = registry.sync_client(key, factory)
+            registry._count_request(key)
+            model = genai.GenerativeModel(model_name=self.id, **self.request_kwargs)
+            model._client = service_client
+            return model
+
+    return PooledGemini
+
+
+PROVIDERS = {"groq": _pooled_groq, "gemini": _pooled_gemini}
+
+
+@lru_cache(maxsize=None)
+def model_class(provider):
+    """The pooled phi model class for a provider, importing its SDK on first use."""
+    return PROVIDERS[provider]()
@@ -1,23 +1,28 @@
 from phi.agent import Agent
-from phi.model.groq import Groq
 from phi.tools.duckduckgo import DuckDuckGo  # For fetching news
 from phi.tools.coingecko import CoinGecko  # For fetching cryptocurrency prices
 from phi.tools.amazon import AmazonSearch  # For searching e-commerce products
 from phi.tools.skyscanner import SkyscannerFlightSearch, SkyscannerHotelSearch  # For fetching flights and hotels
 from phi.tools.sports import SportsNews  # For fetching sports news
 from dotenv import load_dotenv
+import os
+
+from job_runner import JobRunner
+from model_registry import get_model
+from tool_cache import cache_tools
 
 # Load environment variables (e.g., API keys)
 load_dotenv()
 
-# ✅ Unified Groq Model
-groq_model = Groq(id="llama-3.3-70b-versatile")  # AI model for processing data
+# ✅ Unified Groq Model: one pooled client, with a separate model object per agent so
+# concurrent agents don't mix up each other's tools
+GROQ_MODEL = "llama-3.3-70b-versatile"  # AI model for processing data
 
 # ✅ News Agent (Fetches latest financial news)
 news_agent = Agent(
     name="News Agent",
-    model=groq_model,
-    tools=[DuckDuckGo()],  # Uses DuckDuckGo to fetch news
+    model=get_model("groq", GROQ_MODEL),
+    tools=[cache_tools(DuckDuckGo())],  # Uses DuckDuckGo to fetch news, repeated searches come from cache
     instructions=[
         "Search for the latest financial news about the given company.",
         "Summarize the top news articles.",
@@ -31,7 +36,7 @@ news_agent = Agent(
 # ✅ Crypto Price Agent (Fetches real-time cryptocurrency prices)
 crypto_price_agent = Agent(
     name="Crypto Price Agent",
-    model=groq_model,
+    model=get_model("groq", GROQ_MODEL),
     tools=[CoinGecko()],  # Uses CoinGecko API to fetch crypto data
     instructions=[
         "Fetch the latest price for the given cryptocurrency.",
@@ -46,7 +51,7 @@ crypto_price_agent = Agent(
 # ✅ E-commerce Product Finder Agent (Finds product reviews and prices)
 ecommerce_agent = Agent(
     name="E-commerce Product Finder Agent",
-    model=groq_model,
+    model=get_model("groq", GROQ_MODEL),
     tools=[AmazonSearch()],  # Uses AmazonSearch to find products
     instructions=[
         "Search for the latest reviews and prices of the given product.",
@@ -61,7 +66,7 @@ ecommerce_agent = Agent(
 # ✅ Travel Agent (Fetches flight and hotel details)
 travel_agent = Agent(
     name="Travel Agent",
-    model=groq_model,
+    model=get_model("groq", GROQ_MODEL),
     tools=[SkyscannerFlightSearch(), SkyscannerHotelSearch()],  # Uses Skyscanner for flights and hotels
     instructions=[
         "Find available flights and hotels for the given destination and dates.",
@@ -76,7 +81,7 @@ travel_agent = Agent(
 # ✅ Sports News Agent (Fetches the latest sports news)
 sports_news_agent = Agent(
     name="Sports News Agent",
-    model=groq_model,
+    model=get_model("groq", GROQ_MODEL),
     tools=[SportsNews()],  # Uses SportsNews to get the latest headlines
     instructions=[
         "Search for the latest news in the world of sports.",
@@ -89,33 +94,18 @@ sports_news_agent = Agent(
 )
 
 # ✅ Run Queries
-
-# Financial News Query
-news_agent.print_response(
-    "Find and summarize the latest financial news about Tesla and NVIDIA.", 
-    stream=True
-)
-
-# Crypto Price Query
-crypto_price_agent.print_response(
-    "Fetch the latest price for Bitcoin.", 
-    stream=True
-)
-
-# Product Finder Query
-ecommerce_agent.print_response(
-    "Search for the latest reviews and prices of the iPhone 15.", 
-    stream=True
-)
-
-# Travel Details Query
-travel_agent.print_response(
-    "Find flights and hotels for a trip to Paris next month.", 
-    stream=True
-)
-
-# Sports News Query
-sports_news_agent.print_response(
-    "Find the latest sports news about the NBA.", 
-    stream=True
-)
+# The five queries are independent, so they run at the same time; each agent's answer is
+# printed as its own panel when it finishes. Set AGENT_OUTPUT_DIR to also stream each answer
+# to <dir>/<agent>.md as it arrives
+JobRunner(output_dir=os.getenv("AGENT_OUTPUT_DIR")).run([
+    # Financial News Query
+    (news_agent, "Find and summarize the latest financial news about Tesla and NVIDIA."),
+    # Crypto Price Query
+    (crypto_price_agent, "Fetch the latest price for Bitcoin."),
+    # Product Finder Query
+    (ecommerce_agent, "Search for the latest reviews and prices of the iPhone 15."),
+    # Travel Details Query
+    (travel_agent, "Find flights and hotels for a trip to Paris next month."),
+    # Sports News Query
+    (sports_news_agent, "Find the latest sports news about the NBA."),
+])
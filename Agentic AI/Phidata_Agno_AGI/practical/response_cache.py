@@ -0,0 +1,153 @@
+"""Semantic cache of agent answers for repeated, near-identical prompts.
+
+Lookups try an exact match on the normalized prompt first, then the most similar stored
+prompt in a local numpy index of hashed word and character n-gram embeddings. A
+similar prompt only counts when it names the same tickers and numbers, so "compare
+TSLA and MSFT" can reuse "compare MSFT and TSLA" but never an answer about AAPL.
+
+    cache = SemanticCache()
+    hit = cache.get(query)
+    content = hit.content if hit else cache.put(query, agent.run(query).content)
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(60 * 60)))  # seconds
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.9"))  # cosine similarity
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+EMBEDDING_DIM = 1024
+
+_WORD = re.compile(r"\w+")
+_TICKER = re.compile(r"\b[A-Z]{1,5}(?:\.[A-Z]{1,2})?\b")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize(prompt):
+    return " ".join(prompt.split()).casefold()
+
+
+def entities(prompt):
+    """Tickers and numbers in a prompt; a cached answer is only reused when these match."""
+    return frozenset(_TICKER.findall(prompt)), frozenset(_NUMBER.findall(prompt))
+
+
+def _bucket(feature):
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % EMBEDDING_DIM, 1.0 if value >> 63 else -1.0
+
+
+def embed(prompt):
+    """Unit-length hashed bag of words, word bigrams and character trigrams."""
+    words = _WORD.findall(normalize(prompt))
+    features = list(words)
+    features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature in features:
+        index, sign = _bucket(feature)
+        vector[index] += sign
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class CachedResponse:
+    content: str
+    similarity: float  # 1.0 for an exact match
+    age: float  # seconds since it was stored
+    prompt: str  # the prompt the answer was stored for
+
+
+class SemanticCache:
+    """Exact + embedding-similarity cache with a TTL and least-recently-used eviction."""
+
+    def __init__(self, threshold=RESPONSE_CACHE_THRESHOLD, ttl=RESPONSE_CACHE_TTL,
+                 max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Slot-based index: row i of _vectors belongs to _entries[i]
+        self._vectors = np.zeros((max_entries, EMBEDDING_DIM), dtype=np.float32)
+        self._entries = [None] * max_entries  # (prompt, content, entities, stored_at)
+        self._last_used = np.full(max_entries, -np.inf)  # -inf marks a free slot
+        self._stored_at = np.zeros(max_entries)
+        self._slot_by_prompt = {}  # normalized prompt -> slot
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+
+    def get(self, prompt, threshold=None):
+        """The cached answer for this prompt or a close enough one, or None."""
+        threshold = self.threshold if threshold is None else threshold
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            slot = self._slot_by_prompt.get(normalize(prompt))
+            if slot is not None:
+                self.hits["exact"] += 1
+                return self._hit(slot, 1.0, now)
+
+            live = np.flatnonzero(np.isfinite(self._last_used))
+            if live.size:
+                similarities = self._vectors[live] @ embed(prompt)
+                wanted = entities(prompt)
+                for i in np.argsort(similarities)[::-1]:
+                    if similarities[i] < threshold:
+                        break
+                    if self._entries[live[i]][2] == wanted:
+                        self.hits["semantic"] += 1
+                        return self._hit(live[i], float(similarities[i]), now)
+            self.misses += 1
+            return None
+
+    def put(self, prompt, content):
+        """Store an answer and return it, replacing the least recently used one when full."""
+        key = normalize(prompt)
+        now = time.time()
+        with self._lock:
+            slot = self._slot_by_prompt.get(key)
+            if slot is None:
+                slot = int(np.argmin(self._last_used))
+                if self._entries[slot] is not None:
+                    del self._slot_by_prompt[normalize(self._entries[slot][0])]
+            self._slot_by_prompt[key] = slot
+            self._vectors[slot] = embed(prompt)
+            self._entries[slot] = (prompt, content, entities(prompt), now)
+            self._last_used[slot] = now
+            self._stored_at[slot] = now
+        return content
+
+    def _hit(self, slot, similarity, now):
+        prompt, content, _, stored_at = self._entries[slot]
+        self._last_used[slot] = now
+        return CachedResponse(content=content, similarity=similarity, age=now - stored_at, prompt=prompt)
+
+    def _expire(self, now):
+        expired = np.flatnonzero(np.isfinite(self._last_used) & (self._stored_at < now - self.ttl))
+        for slot in expired:
+            del self._slot_by_prompt[normalize(self._entries[slot][0])]
+            self._entries[slot] = None
+        self._last_used[expired] = -np.inf
+
+    def __len__(self):
+        return len(self._slot_by_prompt)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._slot_by_prompt), **self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._entries = [None] * self.max_entries
+            self._last_used[:] = -np.inf
+            self._slot_by_prompt.clear()
@@ -0,0 +1,99 @@
+"""Company name <-> stock symbol registry shared by the finance agents and the dashboard.
+
+Listings are loaded once from a JSON or CSV file (`company_symbols.json` by default,
+override with the SYMBOL_LISTINGS_FILE environment variable).
+"""
+
+import csv
+import difflib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_LISTINGS_FILE = Path(__file__).parent / "company_symbols.json"
+
+
+class SymbolRegistry:
+    """Bidirectional, hash-indexed lookup between company names and stock symbols."""
+
+    def __init__(self, listings=()):
+        self._symbol_by_name = {}  # casefolded name or alias -> symbol
+        self._listing_by_symbol = {}  # symbol -> listing dict
+        for listing in listings:
+            self.add(**listing)
+
+    def add(self, name, symbol, sector=None, aliases=()):
+        """Register a listing; the first name registered for a symbol is its display name."""
+        symbol = symbol.strip().upper()
+        self._listing_by_symbol.setdefault(
+            symbol, {"name": name.strip(), "symbol": symbol, "sector": sector}
+        )
+        for key in (name, *aliases):
+            self._symbol_by_name[key.strip().casefold()] = symbol
+
+    @classmethod
+    def from_file(cls, path):
+        """Load listings from a JSON list of objects or a CSV with name,symbol[,sector][,aliases] columns.
+
+        CSV aliases are separated by semicolons.
+        """
+        path = Path(path)
+        with open(path, encoding="utf-8") as f:
+            if path.suffix.lower() == ".csv":
+                listings = [
+                    {
+                        "name": row["name"],
+                        "symbol": row["symbol"],
+                        "sector": row.get("sector") or None,
+                        "aliases": [a for a in (row.get("aliases") or "").split(";") if a.strip()],
+                    }
+                    for row in csv.DictReader(f)
+                ]
+            else:
+                listings = json.load(f)
+        return cls(listings)
+
+    def symbol_for(self, company, fuzzy=True, cutoff=0.8):
+        """Return the symbol for a company name, alias or symbol, or None if unknown.
+
+        With `fuzzy`, misspelled names fall back to the closest registered name.
+        """
+        if not company:
+            return None
+        key = company.strip().casefold()
+        if key in self._symbol_by_name:
+            return self._symbol_by_name[key]
+        if company.strip().upper() in self._listing_by_symbol:
+            return company.strip().upper()
+        if fuzzy:
+            matches = difflib.get_close_matches(key, self._symbol_by_name.keys(), n=1, cutoff=cutoff)
+            if matches:
+                return self._symbol_by_name[matches[0]]
+        return None
+
+    def name_for(self, symbol):
+        """Return the display name for a symbol, or the symbol itself if it is not registered."""
+        listing = self._listing_by_symbol.get(symbol)
+        return listing["name"] if listing else symbol
+
+    def names(self):
+        """Return display names in listing order."""
+        return [listing["name"] for listing in self._listing_by_symbol.values()]
+
+    def symbols(self):
+        """Return symbols in listing order."""
+        return list(self._listing_by_symbol)
+
+    def __contains__(self, symbol):
+        return symbol in self._listing_by_symbol
+
+    def __len__(self):
+        return len(self._listing_by_symbol)
+
+
+@lru_cache(maxsize=None)
+def load_registry(path=None):
+    """Return the process-wide registry for a listings file, loading it on first use."""
+    path = path or os.getenv("SYMBOL_LISTINGS_FILE") or DEFAULT_LISTINGS_FILE
+    return SymbolRegistry.from_file(path)
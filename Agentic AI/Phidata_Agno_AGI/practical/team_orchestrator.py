@@ -0,0 +1,177 @@
+"""Parallel execution for phi `Agent(team=[...])` teams.
+
+A phi team leader delegates through transfer tool calls, one member at a time. The
+TeamOrchestrator instead asks the leader's model for a plan of sub-tasks with their
+dependencies, runs every independent sub-task on its member agent at the same time,
+and hands the collected results back to the leader for the final answer, so a team
+takes about max(member) + leader instead of the sum.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+
+from phi.agent import Agent, RunResponse
+from phi.model.base import Model
+from phi.utils.log import logger
+
+PLANNER_INSTRUCTIONS = [
+    "You split a user request into sub-tasks for the members of a team.",
+    "Reply with JSON only: a list of objects with keys "
+    '"member" (exact member name), "task" (what that member should do) and '
+    '"depends_on" (indexes of earlier sub-tasks whose results it needs, usually []).',
+    "Give each member at most one sub-task unless the request clearly needs more.",
+    "Only add a dependency when a sub-task cannot start without another's result.",
+]
+
+
+@dataclass
+class SubTask:
+    member: Agent
+    task: str
+    depends_on: list = field(default_factory=list)
+    output: str = ""
+    seconds: float = 0.0
+
+
+def _supports_async(agent):
+    """Whether the agent's model implements async responses (Gemini, for one, does not)."""
+    return type(agent.model).aresponse is not Model.aresponse
+
+
+def _describe(member):
+    instructions = member.instructions or []
+    if isinstance(instructions, str):
+        instructions = [instructions]
+    return f"- {member.name}: {member.role or ' '.join(instructions)}"
+
+
+def _content(response):
+    content = response.content if isinstance(response, RunResponse) else response
+    if content is None:
+        return "No response from the member agent."
+    return content if isinstance(content, str) else json.dumps(content, indent=2, default=str)
+
+
+def _first_json_list(text):
+    """The first JSON list in text; anything around it (code fences, "see [1]") is ignored."""
+    decoder = json.JSONDecoder()
+    start = text.find("[")
+    while start >= 0:
+        try:
+            value = decoder.raw_decode(text, start)[0]
+            if isinstance(value, list):
+                return value
+        except ValueError:
+            pass
+        start = text.find("[", start + 1)
+    return []
+
+
+class TeamOrchestrator:
+    """Plan -> run independent members concurrently -> leader synthesis, for a phi team Agent."""
+
+    def __init__(self, team_agent, max_concurrency=None):
+        if not team_agent.has_team():
+            raise ValueError(f"{team_agent.name or 'Agent'} has no team members")
+        self.team_agent = team_agent
+        self.members = {member.name: member for member in team_agent.team}
+        self._by_key = {name.casefold(): member for name, member in self.members.items()}
+        self.max_concurrency = max_concurrency or len(self.members)
+        # The leader without its team answers from the members' results instead of re-delegating
+        self.synthesizer = team_agent.deep_copy(update={"team": None})
+        self.planner = Agent(
+            name=f"{team_agent.name} Planner",
+            model=team_agent.model.deep_copy(),
+            instructions=PLANNER_INSTRUCTIONS,
+            markdown=False,
+        )
+
+    def plan(self, query):
+        """Ask the leader's model for sub-tasks; falls back to giving every member the whole query."""
+        roster = "\n".join(_describe(member) for member in self.members.values())
+        try:
+            reply = _content(self.planner.run(f"Team members:\n{roster}\n\nUser request:\n{query}"))
+            raw_tasks = _first_json_list(reply)
+            tasks = [
+                SubTask(
+                    member=self._by_key[item["member"].strip().casefold()],
+                    task=item["task"],
+                    depends_on=[i for i in item.get("depends_on") or [] if isinstance(i, int) and 0 <= i < index],
+                )
+                for index, item in enumerate(raw_tasks)
+            ]
+            if tasks:
+                return tasks
+            logger.warning("Planner returned no sub-tasks, sending the request to every member")
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Could not parse the team plan ({e}), sending the request to every member")
+        return [SubTask(member=member, task=query) for member in self.members.values()]
+
+    async def _run_member(self, subtask, agent, prompt, semaphore):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if _supports_async(agent):
+                    response = await agent.arun(prompt, stream=False)
+                else:
+                    response = await asyncio.to_thread(agent.run, prompt, stream=False)
+                subtask.output = _content(response)
+            except Exception as e:
+                # One failed member should not sink the whole team answer
+                logger.warning(f"{agent.name} failed: {e}")
+                subtask.output = f"{agent.name} could not complete this task: {e}"
+            subtask.seconds = time.perf_counter() - started
+
+    async def arun_members(self, tasks):
+        """Run sub-tasks in dependency waves; every sub-task within a wave runs concurrently."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        done = set()
+        while len(done) < len(tasks):
+            wave = [i for i, t in enumerate(tasks) if i not in done and all(d in done for d in t.depends_on)]
+            if not wave:  # a dependency cycle the planner should not have produced
+                wave = [i for i in range(len(tasks)) if i not in done]
+            busy = set()
+            runs = []
+            for i in wave:
+                subtask = tasks[i]
+                # A phi Agent keeps per-run state, so a member busy in this wave gets a copy
+                agent = subtask.member.deep_copy() if subtask.member.name in busy else subtask.member
+                busy.add(subtask.member.name)
+                prompt = subtask.task
+                for d in subtask.depends_on:
+                    prompt += f"\n\nResult from {tasks[d].member.name}:\n{tasks[d].output}"
+                runs.append(self._run_member(subtask, agent, prompt, semaphore))
+            await asyncio.gather(*runs)
+            done.update(wave)
+        return tasks
+
+    def synthesis_prompt(self, query, tasks):
+        sections = "\n\n".join(
+            f"### {t.member.name}\nTask: {t.task}\n\n{t.output}" for t in tasks
+        )
+        return (
+            f"{query}\n\nYour team members have already gathered the following results. "
+            f"Combine them into the final answer; do not invent data they did not provide.\n\n{sections}"
+        )
+
+    async def arun(self, query):
+        """Plan, run members concurrently and return the leader's RunResponse."""
+        tasks = await asyncio.to_thread(self.plan, query)
+        await self.arun_members(tasks)
+        for t in tasks:
+            logger.info(f"{t.member.name} finished in {t.seconds:.1f}s")
+        prompt = self.synthesis_prompt(query, tasks)
+        if _supports_async(self.synthesizer):
+            return await self.synthesizer.arun(prompt, stream=False)
+        return await asyncio.to_thread(self.synthesizer.run, prompt, stream=False)
+
+    def run(self, query):
+        return asyncio.run(self.arun(query))
+
+    def print_response(self, query, stream=True, **kwargs):
+        """Gather member results concurrently, then print the leader's synthesis like Agent.print_response."""
+        tasks = self.plan(query)
+        asyncio.run(self.arun_members(tasks))
+        self.synthesizer.print_response(self.synthesis_prompt(query, tasks), stream=stream, **kwargs)
@@ -0,0 +1,236 @@
+"""Result cache for phi toolkit calls (DuckDuckGo, YFinanceTools, ...).
+
+Team leaders and repeat users often trigger the same search or ticker lookup several
+times; `cache_tools(toolkit)` wraps every function of a toolkit so a call with the same
+tool name and normalized arguments is answered from cache while it is fresh.
+
+    from tool_cache import cache_tools
+    Agent(tools=[cache_tools(DuckDuckGo(), ttl=30)], ...)  # live scores: 30 seconds
+
+Entries sit in a size-bounded in-memory LRU, optionally backed by SQLite
+(TOOL_CACHE_PATH) so they survive restarts and are shared between processes. With
+`show_tool_calls=True`, a call answered from cache is marked in its "Running:" line:
+
+    - get_current_stock_price(symbol=AAPL) ♻️ cached 12s ago
+"""
+
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from phi.utils.log import logger
+
+TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH")  # unset: memory only
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024"))
+
+# Seconds a result stays fresh, per tool; prices and news age fast, fundamentals slowly
+DEFAULT_TTL = 15 * 60
+TOOL_TTLS = {
+    "duckduckgo_search": 15 * 60,
+    "duckduckgo_news": 5 * 60,
+    "get_current_stock_price": 60,
+    "get_company_news": 15 * 60,
+    "get_technical_indicators": 60 * 60,
+    "get_historical_stock_prices": 60 * 60,
+    "get_analyst_recommendations": 6 * 60 * 60,
+    "get_stock_fundamentals": 6 * 60 * 60,
+    "get_key_financial_ratios": 6 * 60 * 60,
+    "get_income_statements": 24 * 60 * 60,
+    "get_company_info": 24 * 60 * 60,
+}
+
+
+def _normalize(value):
+    """Fold argument spelling that cannot change a result: case, extra whitespace, key order."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def _looks_like_error(result):
+    # phi toolkits report failures as strings rather than raising
+    return result.lstrip().lower().startswith(("error", "could not"))
+
+
+class ToolCache:
+    """LRU of tool results keyed on tool name + normalized arguments, with optional SQLite backing."""
+
+    def __init__(self, max_entries=TOOL_CACHE_MAX_ENTRIES, path=TOOL_CACHE_PATH):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self._conn = None
+        if path:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS tool_results (
+                    key TEXT PRIMARY KEY,
+                    tool TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tool_results_last_used ON tool_results (last_used)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(tool_name, arguments):
+        return f"{tool_name}:{json.dumps(_normalize(arguments), sort_keys=True, default=str)}"
+
+    def get(self, key, ttl):
+        """Return (result, age in seconds) if a result younger than `ttl` is cached, else None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT stored_at, result FROM tool_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = tuple(row)
+                    self._remember(key, entry)
+            if entry is None or now - entry[0] > ttl:
+                return None
+            self._entries.move_to_end(key)
+            if self._conn is not None:
+                self._conn.execute("UPDATE tool_results SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            return entry[1], now - entry[0]
+
+    def put(self, key, tool_name, result):
+        now = time.time()
+        with self._lock:
+            self._remember(key, (now, result))
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tool_results VALUES (?, ?, ?, ?, ?)", (key, tool_name, result, now, now)
+                )
+                # Same bound on disk, least recently used rows first
+                self._conn.execute(
+                    "DELETE FROM tool_results WHERE key IN ("
+                    "SELECT key FROM tool_results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._conn.commit()
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def count(self, tool_name, hit):
+        with self._lock:
+            counts = self.hits if hit else self.misses
+            counts[tool_name] = counts.get(tool_name, 0) + 1
+
+    def stats(self):
+        """{tool name: {"hits": n, "misses": n}} since start."""
+        with self._lock:
+            return {
+                name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                for name in sorted(set(self.hits) | set(self.misses))
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM tool_results")
+                self._conn.commit()
+
+
+tool_cache = ToolCache()
+
+
+def _cached_entrypoint(name, entrypoint, ttl, cache):
+    signature = inspect.signature(entrypoint)
+
+    def bind(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()  # search(q) and search(q, max_results=5) share an entry
+        return bound
+
+    @functools.wraps(entrypoint)
+    def wrapper(*args, **kwargs):
+        bound = bind(args, kwargs)
+        key = cache.make_key(name, bound.arguments)
+        cached = cache.get(key, ttl)
+        call = f"{name}({', '.join(f'{k}={v}' for k, v in bound.arguments.items())})"
+        if cached is not None:
+            result, age = cached
+            cache.count(name, hit=True)
+            logger.info(f"♻️ Cache hit: {call} ({age:.0f}s old, fresh for {ttl}s)")
+            return result
+        cache.count(name, hit=False)
+        result = entrypoint(*args, **kwargs)
+        # Only plain-text answers are cached; failures are retried next time
+        if isinstance(result, str) and not _looks_like_error(result):
+            cache.put(key, name, result)
+        return result
+
+    def cached_age(arguments):
+        """Age in seconds of the fresh result a call with these arguments would reuse, else None."""
+        try:
+            cached = cache.get(cache.make_key(name, bind((), arguments).arguments), ttl)
+        except TypeError:  # arguments the tool would reject anyway
+            return None
+        return cached[1] if cached is not None else None
+
+    wrapper.cached_age = cached_age
+    return wrapper
+
+
+def _mark_cache_hits():
+    """Make phi's show_tool_calls lines say when a call will be answered from cache.
+
+    phi renders "Running: tool(args)" from FunctionCall.get_call_str() before the tool
+    runs, so the marker is decided there; calls to uncached functions are unchanged.
+    """
+    from phi.tools.function import FunctionCall
+
+    get_call_str = FunctionCall.get_call_str
+    if getattr(get_call_str, "marks_cache_hits", False):
+        return
+
+    def get_call_str_with_cache(self):
+        call = get_call_str(self)
+        cached_age = getattr(self.function.entrypoint, "cached_age", None)
+        age = cached_age(self.arguments or {}) if cached_age else None
+        return call if age is None else f"{call} ♻️ cached {age:.0f}s ago"
+
+    get_call_str_with_cache.marks_cache_hits = True
+    FunctionCall.get_call_str = get_call_str_with_cache
+
+
+def cache_tools(toolkit, ttl=None, ttls=None, cache=None):
+    """Cache every function of a phi Toolkit in place and return the toolkit.
+
+    `ttl` sets one freshness window (seconds) for all its functions; `ttls` overrides it per
+    function name; anything unset falls back to TOOL_TTLS, then DEFAULT_TTL.
+    """
+    cache = cache or tool_cache
+    ttls = ttls or {}
+    _mark_cache_hits()
+    for name, function in list(toolkit.functions.items()):
+        if function.entrypoint is None:
+            continue
+        function_ttl = ttls.get(name, ttl if ttl is not None else TOOL_TTLS.get(name, DEFAULT_TTL))
+        toolkit.functions[name] = function.model_copy(
+            update={"entrypoint": _cached_entrypoint(name, function.entrypoint, function_ttl, cache)}
+        )
+    return toolkit
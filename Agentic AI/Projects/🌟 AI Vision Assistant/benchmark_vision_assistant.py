@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""Offline benchmark for the 🌟 AI Vision Assistant.
+
+Starts a local OpenAI-compatible stand-in for OpenRouter with configurable latency,
+streaming and error behaviour, points the assistant at it and drives
+`process_all_models` at increasing concurrency, reporting p50/p95/p99 latency,
+throughput and memory. No network access or API key is needed.
+
+    python benchmark_vision_assistant.py --concurrency 1 4 16 --requests 48
+    python benchmark_vision_assistant.py --profile slow_grok.json --save baseline.json
+    python benchmark_vision_assistant.py --baseline baseline.json  # exits 1 on regression
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+ASSISTANT_PATH = Path(__file__).with_name("🌟_ai_vision_assistant.py")
+
+# =============================================
+# 🎭 MOCK OPENROUTER SERVER
+# =============================================
+
+@dataclass
+class ModelProfile:
+    """How the mock server behaves for one model"""
+    ttft_median: float = 0.8  # seconds to first token, log-normally distributed
+    ttft_sigma: float = 0.4
+    tokens: int = 120  # completion tokens streamed per answer
+    token_interval: float = 0.005  # seconds between streamed tokens
+    error_rate: float = 0.0  # share of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # share of requests answered with HTTP 429
+    drop_rate: float = 0.0  # share of streams cut off halfway
+
+    def sample_ttft(self, rng):
+        return rng.lognormvariate(math.log(self.ttft_median), self.ttft_sigma)
+
+# Rough shape of the three real models: GPT-5 Pro is slow, Grok 4 Fast is quick
+DEFAULT_PROFILES = {
+    "openai/gpt-5-pro": ModelProfile(ttft_median=2.5, ttft_sigma=0.5, tokens=250),
+    "google/gemini-2.5-flash-image": ModelProfile(ttft_median=0.9, ttft_sigma=0.4, tokens=180),
+    "x-ai/grok-4-fast": ModelProfile(ttft_median=0.5, ttft_sigma=0.3, tokens=150),
+}
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections or cancelled streams are expected
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+class MockOpenRouter:
+    """Threaded HTTP server speaking enough of /v1/chat/completions for the assistant"""
+
+    def __init__(self, profiles, default_profile=None, time_scale=1.0, seed=None, port=0):
+        self.profiles = profiles
+        self.default_profile = default_profile or ModelProfile()
+        self.time_scale = time_scale
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = QuietHTTPServer(("127.0.0.1", port), self._handler())
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="mock-openrouter", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _draw(self, profile):
+        with self._lock:
+            self.requests += 1
+            return {
+                "ttft": profile.sample_ttft(self._rng) * self.time_scale,
+                "outcome": self._rng.random(),
+                "drop": self._rng.random() < profile.drop_rate,
+            }
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _chunk(self, data):
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._json(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                model = request.get("model", "")
+                profile = mock.profiles.get(model, mock.default_profile)
+                draw = mock._draw(profile)
+
+                time.sleep(draw["ttft"])
+                if draw["outcome"] < profile.error_rate:
+                    self._json(500, {"error": {"message": "mock upstream error", "code": 500}})
+                    return
+                if draw["outcome"] < profile.error_rate + profile.rate_limit_rate:
+                    self._json(429, {"error": {"message": "mock rate limit", "code": 429}})
+                    return
+
+                prompt_tokens = 85 + sum(
+                    len(part.get("text", "")) // 4
+                    for message in request.get("messages", [])
+                    for part in (message["content"] if isinstance(message["content"], list) else [])
+                )
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": profile.tokens,
+                         "total_tokens": prompt_tokens + profile.tokens}
+                words = [f"token{i} " for i in range(profile.tokens)]
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+                if not request.get("stream"):
+                    time.sleep(profile.token_interval * profile.tokens * mock.time_scale)
+                    self._json(200, {
+                        "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": "".join(words)}}],
+                        "usage": usage,
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def event(choices, **extra):
+                    body = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                            "model": model, "choices": choices, **extra}
+                    self._chunk(f"data: {json.dumps(body)}\n\n".encode("utf-8"))
+
+                try:
+                    for i, word in enumerate(words):
+                        if draw["drop"] and i == len(words) // 2:
+                            self.close_connection = True
+                            return  # connection closed mid-stream
+                        event([{"index": 0, "delta": {"content": word}, "finish_reason": None}])
+                        time.sleep(profile.token_interval * mock.time_scale)
+                    event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                    if (request.get("stream_options") or {}).get("include_usage"):
+                        event([], usage=usage)
+                    self._chunk(b"data: [DONE]\n\n")
+                    self._chunk(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # the client cancelled, e.g. a hedging loser
+
+        return Handler
+
+def load_profiles(path):
+    """Read {"model id": {ModelProfile fields}, "default": {...}} from a JSON file"""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    default = ModelProfile(**raw.pop("default")) if "default" in raw else None
+    return {model: ModelProfile(**fields) for model, fields in raw.items()}, default
+
+# =============================================
+# 🏃 DRIVER
+# =============================================
+
+def load_assistant(base_url):
+    """Import the assistant pointed at the mock server, with its response cache off"""
+    os.environ["OPENROUTER_BASE_URL"] = base_url
+    os.environ["VISION_CACHE_MAX_MB"] = "0"
+    os.environ.pop("VISION_METRICS_PORT", None)
+    spec = importlib.util.spec_from_file_location("vision_assistant", ASSISTANT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(q / 100 * len(ordered))) - 1)]
+
+def run_request(assistant, image, prompt, hedge):
+    """Drive one click of "Analyze Image" to completion; returns (seconds, first finished card seconds, failed cards)"""
+    start = time.perf_counter()
+    first_update = None
+    html = ""
+    for html in assistant.process_all_models("benchmark-key", image, prompt, True, True, True,
+                                             use_cache=False, hedge=hedge):
+        cards = html.count('class="model-card"')
+        if first_update is None and cards and html.count(">Running<") < cards:
+            first_update = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    return elapsed, first_update or elapsed, html.count(">Failed<") + html.count(">Skipped<")
+
+def run_level(assistant, concurrency, requests, image, prompt, hedge, trace_memory):
+    """Fire `requests` clicks from `concurrency` simulated users and summarize them"""
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="user") as users:
+        results = list(users.map(lambda _: run_request(assistant, image, prompt, hedge), range(requests)))
+    wall = time.perf_counter() - started
+    peak_traced = None
+    if trace_memory:
+        peak_traced = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    latencies = [elapsed for elapsed, _, _ in results]
+    first_cards = [first for _, first, _ in results]
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": statistics.fmean(latencies),
+        "first_card_p50": percentile(first_cards, 50),
+        "throughput": requests / wall,
+        "failed_cards": sum(failed for _, _, failed in results),
+        "peak_traced_mb": peak_traced,
+        "max_rss_mb": max_rss_mb(),
+    }
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def print_table(rows):
+    header = (f"{'users':>5} {'reqs':>5} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'1st card':>8} "
+              f"{'req/s':>7} {'failed':>6} {'traced MB':>9} {'RSS MB':>7}")
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        traced = f"{row['peak_traced_mb']:.1f}" if row["peak_traced_mb"] is not None else "-"
+        rss = f"{row['max_rss_mb']:.0f}" if row["max_rss_mb"] is not None else "-"
+        print(f"{row['concurrency']:>5} {row['requests']:>5} {row['p50']:>7.2f} {row['p95']:>7.2f} "
+              f"{row['p99']:>7.2f} {row['first_card_p50']:>8.2f} {row['throughput']:>7.2f} "
+              f"{row['failed_cards']:>6} {traced:>9} {rss:>7}")
+
+def compare_to_baseline(rows, baseline_path, tolerance):
+    """Print regressions against a saved run; returns True if any level got worse than `tolerance`"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {row["concurrency"]: row for row in json.load(f)["levels"]}
+    regressed = False
+    for row in rows:
+        base = baseline.get(row["concurrency"])
+        if not base:
+            continue
+        if row["p95"] > base["p95"] * (1 + tolerance):
+            print(f"❌ {row['concurrency']} users: p95 {row['p95']:.2f}s vs baseline {base['p95']:.2f}s")
+            regressed = True
+        if row["throughput"] < base["throughput"] * (1 - tolerance):
+            print(f"❌ {row['concurrency']} users: {row['throughput']:.2f} req/s vs baseline {base['throughput']:.2f}")
+            regressed = True
+    if not regressed:
+        print(f"✅ Within {tolerance:.0%} of {baseline_path}")
+    return regressed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the AI Vision Assistant against a local mock OpenRouter")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="Simulated concurrent users per level")
+    parser.add_argument("--requests", type=int, default=32, help="Clicks per concurrency level")
+    parser.add_argument("--image-size", default="1600x1200", help="Synthetic image WIDTHxHEIGHT")
+    parser.add_argument("--prompt", default="What is in this image? Describe it in detail.")
+    parser.add_argument("--profile", help="JSON file of per-model ModelProfile overrides")
+    parser.add_argument("--error-rate", type=float, help="Override every model's HTTP 500 rate")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiply all mock delays, e.g. 0.1 for a quick run")
+    parser.add_argument("--hedge", action="store_true", help="Benchmark with hedged routing")
+    parser.add_argument("--trace-memory", action="store_true", help="Report tracemalloc peaks (slows the run, so compare latencies only between traced runs)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--save", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare with a saved results JSON and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95/throughput drift vs the baseline")
+    args = parser.parse_args(argv)
+
+    profiles, default_profile = dict(DEFAULT_PROFILES), None
+    if args.profile:
+        overrides, default_profile = load_profiles(args.profile)
+        profiles.update(overrides)
+    if args.error_rate is not None:
+        profiles = {model: ModelProfile(**{**asdict(p), "error_rate": args.error_rate}) for model, p in profiles.items()}
+
+    mock = MockOpenRouter(profiles, default_profile, time_scale=args.time_scale, seed=args.seed).start()
+    assistant = load_assistant(mock.base_url)
+
+    width, height = (int(n) for n in args.image_size.lower().split("x"))
+    image = np.random.default_rng(args.seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+    print(f"🎭 Mock OpenRouter at {mock.base_url} | image {width}x{height} | hedge={'on' if args.hedge else 'off'}")
+    rows = []
+    try:
+        for concurrency in args.concurrency:
+            rows.append(run_level(assistant, concurrency, args.requests, image, args.prompt,
+                                  args.hedge, args.trace_memory))
+            print(f"  ✓ {concurrency} users done", file=sys.stderr)
+    finally:
+        mock.stop()
+
+    print_table(rows)
+    print(f"🎭 Mock server handled {mock.requests} model calls")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": rows}, f, indent=2)
+    if args.baseline and compare_to_baseline(rows, args.baseline, args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -47,12 +47,7 @@ print(completion.choices[0].message.content)
 
 # gemini-2.5-flash-image
 
-from openai import OpenAI
-
-client = OpenAI(
-  base_url="https://openrouter.ai/api/v1",
-  api_key="",
-)
+# Reuses the client above and its open connection to OpenRouter
 
 completion = client.chat.completions.create(
   extra_headers={
@@ -85,12 +80,7 @@ print(completion.choices[0].message.content)
 
 # xAI: Grok 4 Fast
 
-from openai import OpenAI
-
-client = OpenAI(
-  base_url="https://openrouter.ai/api/v1",
-  api_key="",
-)
+# Reuses the client above and its open connection to OpenRouter
 
 completion = client.chat.completions.create(
   extra_headers={
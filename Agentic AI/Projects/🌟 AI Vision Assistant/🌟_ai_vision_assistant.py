@@ -10,15 +10,119 @@ Original file is located at
 # -*- coding: utf-8 -*-
 """Multi-Model AI Assistant - Dark Theme"""
 
-!pip install gradio Pillow -q
+# In Colab, install dependencies first:
+# !pip install gradio Pillow "httpx[http2]" -q
 
 import gradio as gr
-from openai import OpenAI
+import httpx
+from openai import APIStatusError, DefaultHttpxClient, OpenAI
 import requests
 from PIL import Image
+import argparse
 import base64
+import bisect
+import hashlib
 import io
+import json
+import os
+import queue
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
 import time
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Models offered in the UI and batch mode: short name -> (OpenRouter model id, display name)
+AVAILABLE_MODELS = {
+    "gpt5": ("openai/gpt-5-pro", "GPT-5 Pro"),
+    "gemini": ("google/gemini-2.5-flash-image", "Gemini 2.5 Flash"),
+    "grok": ("x-ai/grok-4-fast", "Grok 4 Fast"),
+}
+
+# Seconds each model gets to answer before its card is marked as timed out
+MODEL_DEADLINE_SECONDS = 120
+
+# Image preparation defaults: longest side in pixels and JPEG quality
+DEFAULT_MAX_DIMENSION = 1536
+DEFAULT_JPEG_QUALITY = 85
+
+# Minimum seconds between streamed card updates, so token bursts don't flood the UI
+STREAM_UPDATE_INTERVAL = 0.15
+
+# Repeat analyses of the same image + prompt + model are answered from this local store;
+# set VISION_CACHE_MAX_MB=0 to disable it
+RESPONSE_CACHE_PATH = os.getenv(
+    "VISION_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "ai_vision_assistant", "responses.sqlite")
+)
+RESPONSE_CACHE_MAX_BYTES = int(float(os.getenv("VISION_CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+# Per-call metrics: optional JSONL sink and Prometheus port (0 leaves the endpoint off)
+METRICS_JSONL_PATH = os.getenv("VISION_METRICS_FILE")
+METRICS_PORT = int(os.getenv("VISION_METRICS_PORT", "0"))
+# Recent latencies kept per model for quantile estimates
+METRICS_WINDOW = 500
+
+# Any OpenAI-compatible endpoint works, e.g. the local mock in benchmark_vision_assistant.py
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+# Serving: clicks analysed at once per process (each fans out to every selected model),
+# batch runs at once, and clicks allowed to wait before new ones are turned away
+UI_CONCURRENCY_LIMIT = int(os.getenv("VISION_UI_CONCURRENCY", "8"))
+BATCH_CONCURRENCY_LIMIT = 1
+QUEUE_MAX_SIZE = int(os.getenv("VISION_QUEUE_MAX_SIZE", "64"))
+
+# Keep-alive connection pool held by each shared API client, sized so hedged calls of
+# every concurrent click can be in flight at once
+HTTP_MAX_CONNECTIONS = 2 * UI_CONCURRENCY_LIMIT * len(AVAILABLE_MODELS)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = UI_CONCURRENCY_LIMIT * len(AVAILABLE_MODELS)
+HTTP_KEEPALIVE_EXPIRY = 120
+# Most recently used (base_url, api_key) clients kept warm
+MAX_CACHED_CLIENTS = 32
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Batch mode: images picked up from folders, parallel requests, and requests per
+# minute allowed for each provider (the prefix of the model id)
+BATCH_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif"}
+BATCH_DEFAULT_CONCURRENCY = 8
+PROVIDER_RATE_LIMITS = {"openai": 30, "google": 60, "x-ai": 60}
+
+# Hedged routing: each model's alternate, raced against it when the model has not streamed
+# its first token after HEDGE_MULTIPLIER x its recent p95 time-to-first-token
+HEDGE_ALTERNATES = {
+    "openai/gpt-5-pro": ("openai/gpt-5", "GPT-5"),
+    "google/gemini-2.5-flash-image": ("google/gemini-2.5-flash-lite", "Gemini 2.5 Flash Lite"),
+    "x-ai/grok-4-fast": ("openai/gpt-5-mini", "GPT-5 Mini"),
+}
+HEDGE_QUANTILE = 0.95
+HEDGE_MULTIPLIER = 1.0
+HEDGE_MIN_SAMPLES = 5
+HEDGE_DEFAULT_DELAY = 8.0  # seconds, until enough samples have been seen
+HEDGE_MIN_DELAY = 0.5
+
+# Circuit breaker: skip a model once BREAKER_ERROR_RATE of its last BREAKER_WINDOW calls
+# (at least BREAKER_MIN_CALLS) failed, then let one trial call through after BREAKER_COOLDOWN seconds
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 5
+BREAKER_ERROR_RATE = 0.5
+BREAKER_COOLDOWN = 60
+
+# Shared pool so every selected model of every concurrent click is queried at the same time
+model_pool = ThreadPoolExecutor(max_workers=UI_CONCURRENCY_LIMIT * len(AVAILABLE_MODELS), thread_name_prefix="model")
+# Separate pool for the racing calls of hedged requests, which are awaited from model_pool threads
+hedge_pool = ThreadPoolExecutor(max_workers=2 * UI_CONCURRENCY_LIMIT * len(AVAILABLE_MODELS), thread_name_prefix="hedge")
 
 # Dark theme CSS
 custom_css = """
@@ -192,7 +296,7 @@ custom_css = """
 }
 """
 
-def create_model_card(model_name, response, response_time, tokens_used, status):
+def create_model_card(model_name, response, response_time, tokens_used, status, metrics=None):
     icon = "🤖"
     color = "#ff6b6b"
     if "GPT" in model_name:
@@ -207,6 +311,22 @@ def create_model_card(model_name, response, response_time, tokens_used, status):
 
     status_color = "#4ecdc4" if status == "Success" else "#ff6b6b"
     status_icon = "✅" if status == "Success" else "❌"
+    if status == "Running":
+        status_color = "#ffd93d"
+        status_icon = "⏳"
+    elif status == "Cached":
+        status_color = "#4ecdc4"
+        status_icon = "♻️"
+    elif status == "Skipped":
+        status_icon = "⛔"
+
+    speed = ""
+    if metrics and metrics.get("ttft_seconds") is not None:
+        speed = f" | ⚡ first token {metrics['ttft_seconds']:.2f}s"
+        if metrics.get("tokens_per_second"):
+            speed += f" | 📈 {metrics['tokens_per_second']:.0f} tok/s"
+    if metrics and metrics.get("model") not in (None, model_name):
+        speed += f" | ↪ via {metrics['model']}"
 
     return f"""
     <div class="model-card" style="border-left-color: {color} !important;">
@@ -219,37 +339,464 @@ def create_model_card(model_name, response, response_time, tokens_used, status):
         </div>
         <div class="stats">
             {status_icon} Status: <span style="color: {status_color};">{status}</span> |
-            ⏱️ {response_time} | 🪙 {tokens_used}
+            ⏱️ {response_time} | 🪙 {tokens_used}{speed}
         </div>
     </div>
     """
 
-def process_single_model(client, model_id, model_name, image, text_prompt):
-    """Process image with a single model using your original code structure"""
+@dataclass(frozen=True)
+class ImagePayload:
+    """JPEG data URL prepared once per request and shared by every model call"""
+    data_url: str
+    width: int
+    height: int
+    size_bytes: int
+    content_hash: str
+    encode_seconds: float = 0.0
+
+def prepare_image(image, max_dimension=DEFAULT_MAX_DIMENSION, jpeg_quality=DEFAULT_JPEG_QUALITY):
+    """Downscale and JPEG-encode an image (PIL or numpy) into an ImagePayload"""
+    if isinstance(image, ImagePayload):
+        return image
+
+    started = time.perf_counter()
+    pil_image = image if hasattr(image, 'save') else Image.fromarray(image)
+    # JPEG has no alpha channel or palette
+    if pil_image.mode != "RGB":
+        pil_image = pil_image.convert("RGB")
+    if max_dimension and max(pil_image.size) > max_dimension:
+        pil_image = pil_image.copy()
+        pil_image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    buffered = io.BytesIO()
+    pil_image.save(buffered, format="JPEG", quality=int(jpeg_quality), optimize=True)
+    jpeg_bytes = buffered.getvalue()
+    image_data = base64.b64encode(jpeg_bytes).decode('utf-8')
+
+    payload = ImagePayload(
+        data_url=f"data:image/jpeg;base64,{image_data}",
+        width=pil_image.width,
+        height=pil_image.height,
+        size_bytes=len(jpeg_bytes),
+        # Encoding is deterministic, so identical pixels and settings give identical bytes
+        content_hash=hashlib.sha256(jpeg_bytes).hexdigest(),
+        encode_seconds=time.perf_counter() - started
+    )
+    metrics.record_encode(payload)
+    return payload
+
+class ResponseCache:
+    """SQLite store of model answers keyed on image content hash + prompt + model id
+
+    Rows are evicted least-recently-used first once their total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model_id TEXT NOT NULL,
+                response TEXT NOT NULL,
+                response_time TEXT,
+                tokens_used TEXT,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(payload, text_prompt, model_id):
+        """Content address for one model's answer to one prompt about one prepared image"""
+        parts = (payload.content_hash, text_prompt.strip(), model_id)
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached (response, response_time, tokens_used) or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, response_time, tokens_used FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            return row
+
+    def put(self, key, model_id, response, response_time, tokens_used):
+        """Store an answer, then evict the least recently used rows beyond the size budget"""
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model_id, response, str(response_time), str(tokens_used), size, time.time())
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                evict = []
+                for old_key, old_size in self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY last_used ASC"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    evict.append((old_key,))
+                    total -= old_size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", evict)
+            self._conn.commit()
+
+response_cache = None
+if RESPONSE_CACHE_MAX_BYTES > 0:
     try:
-        # Convert image using your original method
-        if hasattr(image, 'save'):
-            buffered = io.BytesIO()
-            image.save(buffered, format="JPEG")
-            image_data = base64.b64encode(buffered.getvalue()).decode('utf-8')
-        else:
-            # Handle numpy array from Gradio
-            pil_image = Image.fromarray(image)
-            buffered = io.BytesIO()
-            pil_image.save(buffered, format="JPEG")
-            image_data = base64.b64encode(buffered.getvalue()).decode('utf-8')
+        response_cache = ResponseCache()
+    except sqlite3.Error as e:
+        print(f"⚠️ Response cache disabled: {e}")
+
+# =============================================
+# 📈 METRICS
+# =============================================
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+THROUGHPUT_BUCKETS = (5, 10, 20, 40, 80, 160, 320)
+PAYLOAD_BUCKETS = (50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000)
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with one series per label value"""
+
+    def __init__(self, name, help_text, buckets, label=None):
+        self.name, self.help_text, self.buckets, self.label = name, help_text, buckets, label
+        self.series = defaultdict(lambda: {"counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0})
+
+    def observe(self, value, label_value=None):
+        series = self.series[label_value]
+        series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value, series in sorted(self.series.items(), key=lambda item: str(item[0])):
+            labels = f'{self.label}="{label_value}",' if self.label else ""
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series["counts"]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+            suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {series['sum']}")
+            lines.append(f"{self.name}_count{suffix} {series['count']}")
+        return lines
+
+class MetricsRecorder:
+    """Collects per-call samples into per-model histograms, a JSONL sink and a /metrics endpoint"""
+
+    def __init__(self, jsonl_path=METRICS_JSONL_PATH, window=METRICS_WINDOW):
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._server = None
+        self.latency = Histogram("vision_model_latency_seconds", "Total model call latency", LATENCY_BUCKETS, "model")
+        self.ttft = Histogram("vision_model_ttft_seconds", "Time to first streamed token", LATENCY_BUCKETS, "model")
+        self.throughput = Histogram("vision_model_tokens_per_second", "Completion tokens per second after the first token",
+                                    THROUGHPUT_BUCKETS, "model")
+        self.encode = Histogram("vision_image_encode_seconds", "Image resize and JPEG encode time", LATENCY_BUCKETS)
+        self.payload = Histogram("vision_image_payload_bytes", "Encoded JPEG payload size", PAYLOAD_BUCKETS)
+        self.requests = defaultdict(int)  # (model, status) -> calls
+        self.tokens = defaultdict(int)  # (model, kind) -> tokens
+        self.recent = defaultdict(lambda: deque(maxlen=window))  # (model, kind) -> recent seconds
+
+    def record_encode(self, payload):
+        with self._lock:
+            self.encode.observe(payload.encode_seconds)
+            self.payload.observe(payload.size_bytes)
+
+    def record_call(self, sample):
+        """Record one model call; `sample` holds model_id, status and the timing/token fields"""
+        model = sample["model_id"]
+        with self._lock:
+            self.requests[(model, sample["status"])] += 1
+            # Hedging losers are cut short, so their timings would skew the histograms
+            if sample["status"] != "Cancelled":
+                self.latency.observe(sample["latency_seconds"], model)
+            if sample["status"] == "Success":
+                self.recent[(model, "latency")].append(sample["latency_seconds"])
+            if sample.get("ttft_seconds") is not None:
+                self.ttft.observe(sample["ttft_seconds"], model)
+                self.recent[(model, "ttft")].append(sample["ttft_seconds"])
+            if sample.get("tokens_per_second"):
+                self.throughput.observe(sample["tokens_per_second"], model)
+            for kind in ("prompt", "completion"):
+                if sample.get(f"{kind}_tokens"):
+                    self.tokens[(model, kind)] += sample[f"{kind}_tokens"]
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"timestamp": datetime.now(timezone.utc).isoformat(), **sample}) + "\n")
 
-        image_url = f"data:image/jpeg;base64,{image_data}"
+    def quantile(self, model_id, q, kind="latency", min_samples=1):
+        """Quantile of a model's recent "latency" or "ttft" seconds, or None with fewer than `min_samples`"""
+        with self._lock:
+            recent = sorted(self.recent.get((model_id, kind), ()))
+        if not recent or len(recent) < min_samples:
+            return None
+        return recent[min(len(recent) - 1, int(q * len(recent)))]
+
+    def render_prometheus(self):
+        with self._lock:
+            lines = ["# HELP vision_model_requests_total Model calls by outcome",
+                     "# TYPE vision_model_requests_total counter"]
+            lines += [f'vision_model_requests_total{{model="{model}",status="{status}"}} {count}'
+                      for (model, status), count in sorted(self.requests.items())]
+            lines += ["# HELP vision_model_tokens_total Tokens reported by the provider",
+                      "# TYPE vision_model_tokens_total counter"]
+            lines += [f'vision_model_tokens_total{{model="{model}",kind="{kind}"}} {count}'
+                      for (model, kind), count in sorted(self.tokens.items())]
+            for histogram in (self.latency, self.ttft, self.throughput, self.encode, self.payload):
+                lines += histogram.render()
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=METRICS_PORT, host="0.0.0.0"):
+        """Serve the Prometheus text format at /metrics from a daemon thread"""
+        if self._server:
+            return self._server
+        recorder = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = recorder.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        print(f"📈 Metrics at http://{host}:{self._server.server_port}/metrics")
+        return self._server
+
+metrics = MetricsRecorder()
+
+# =============================================
+# 🛡️ ROUTING
+# =============================================
+
+class CircuitBreaker:
+    """Opens after an error spike so a failing model is skipped until its cooldown passes"""
+
+    def __init__(self, window=BREAKER_WINDOW, min_calls=BREAKER_MIN_CALLS,
+                 error_rate=BREAKER_ERROR_RATE, cooldown=BREAKER_COOLDOWN):
+        self.min_calls, self.error_rate, self.cooldown = min_calls, error_rate, cooldown
+        self.outcomes = deque(maxlen=window)
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go ahead; once the cooldown passes, one trial call is let through"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, ok):
+        """Record a call outcome; None releases a trial call that ended without a verdict"""
+        with self._lock:
+            if self.opened_at is not None:
+                # Only the trial call decides whether an open breaker closes again
+                if not self._probing:
+                    return
+                self._probing = False
+                if ok:
+                    self.opened_at = None
+                    self.outcomes.clear()
+                elif ok is not None:
+                    self.opened_at = time.monotonic()
+                return
+            if ok is None:
+                return
+            self.outcomes.append(ok)
+            failures = self.outcomes.count(False)
+            if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.error_rate:
+                self.opened_at = time.monotonic()
+
+    def retry_in(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+            return max(0, int(self.cooldown - (time.monotonic() - self.opened_at)))
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def breaker_for(model_id):
+    with _breakers_lock:
+        if model_id not in _breakers:
+            _breakers[model_id] = CircuitBreaker()
+        return _breakers[model_id]
+
+def is_provider_fault(error):
+    """Whether an error points at the model or provider rather than at the request or API key"""
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return True  # timeouts, dropped connections, broken streams
+
+def hedge_delay(model_id):
+    """Seconds to wait for a model's first token before racing its alternate"""
+    p95 = metrics.quantile(model_id, HEDGE_QUANTILE, "ttft", min_samples=HEDGE_MIN_SAMPLES)
+    if p95 is None:
+        return HEDGE_DEFAULT_DELAY
+    return max(HEDGE_MIN_DELAY, p95 * HEDGE_MULTIPLIER)
+
+def skipped_result(model_id, model_name):
+    message = (f"Skipped: {model_name} has been failing, "
+               f"retrying it in {breaker_for(model_id).retry_in()}s")
+    return dict(response=message, response_time="N/A", tokens_used="N/A", status="Skipped", metrics=None)
+
+_clients = OrderedDict()
+_clients_lock = threading.Lock()
+
+def get_client(api_key, base_url=OPENROUTER_BASE_URL):
+    """Return the long-lived client for (base_url, api_key), so repeat and concurrent
+    requests reuse its warm keep-alive (HTTP/2 when available) connections"""
+    key = (base_url, api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is not None:
+            _clients.move_to_end(key)
+            return client
+
+        client = OpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=DefaultHttpxClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+        )
+        _clients[key] = client
+        while len(_clients) > MAX_CACHED_CLIENTS:
+            _, evicted = _clients.popitem(last=False)
+            evicted.close()
+        return client
+
+def abort_stream(stream):
+    """Abort a response stream from another thread, waking a read blocked on it
+
+    Closing the stream alone leaves a read waiting for the next chunk blocked until the
+    server sends one, so the socket is shut down first.
+    """
+    response = getattr(stream, "response", None)
+    if response is None or response.is_closed:
+        return  # finished: its connection may already serve another request
+    network_stream = response.extensions.get("network_stream")
+    sock = network_stream.get_extra_info("socket") if network_stream else None
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+class CancelEvent(threading.Event):
+    """Event that also aborts the streams attached to it when set
+
+    A hedge loser usually hasn't sent its first token yet, so it would not notice the
+    event between chunks until the model finally answered.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._streams = set()
+        self._streams_lock = threading.Lock()
+
+    def attach(self, stream):
+        with self._streams_lock:
+            self._streams.add(stream)
+        if self.is_set():
+            abort_stream(stream)
+
+    def detach(self, stream):
+        with self._streams_lock:
+            self._streams.discard(stream)
+
+    def set(self):
+        super().set()
+        with self._streams_lock:
+            streams = list(self._streams)
+        for stream in streams:
+            abort_stream(stream)
+
+class AnyEvent:
+    """Read-only event that counts as set once any of its events is set"""
+
+    def __init__(self, *events):
+        self.events = [event for event in events if event is not None]
+
+    def is_set(self):
+        return any(event.is_set() for event in self.events)
+
+    def attach(self, stream):
+        for event in self.events:
+            if hasattr(event, "attach"):
+                event.attach(stream)
+
+    def detach(self, stream):
+        for event in self.events:
+            if hasattr(event, "detach"):
+                event.detach(stream)
+
+def cancelled_result(sample, breaker, latency_seconds):
+    sample.update(status="Cancelled", latency_seconds=latency_seconds)
+    metrics.record_call(sample)
+    breaker.record(None)
+    return dict(response="Cancelled", response_time="N/A", tokens_used="N/A", status="Cancelled", metrics=sample)
+
+def run_single_model(client, model_id, model_name, image, text_prompt, timeout=MODEL_DEADLINE_SECONDS,
+                     on_update=None, cancel=None):
+    """Query a single model, streaming the response, and return the fields of its card
+
+    If given, `on_update` is called with the partially filled card as tokens arrive, and
+    setting the `cancel` event stops reading the stream (a CancelEvent aborts it at once).
+    """
+    breaker = breaker_for(model_id)
+    sample = {"model_id": model_id, "model": model_name}
+    start_time = time.time()
+    if cancel is not None and cancel.is_set():
+        # Given up on while still queued: don't start the request at all
+        return cancelled_result(sample, breaker, 0.0)
+    stream = None
+    try:
+        # Already-prepared payloads pass straight through
+        payload = prepare_image(image)
+        sample.update(payload_bytes=payload.size_bytes, encode_seconds=payload.encode_seconds)
+        image_url = payload.data_url
 
         start_time = time.time()
 
-        # Your original API call structure
-        completion = client.chat.completions.create(
+        # Your original API call structure, streamed
+        stream = client.chat.completions.create(
             extra_headers={
                 "HTTP-Referer": "https://colab.research.google.com/",
                 "X-Title": "AI Vision Assistant",
             },
             extra_body={},
+            timeout=timeout,
             model=model_id,
             messages=[
                 {
@@ -267,50 +814,505 @@ def process_single_model(client, model_id, model_name, image, text_prompt):
                         }
                     ]
                 }
-            ]
+            ],
+            stream=True,
+            stream_options={"include_usage": True}
         )
+        if hasattr(cancel, "attach"):
+            cancel.attach(stream)
+
+        chunks = []
+        usage = None
+        first_token_at = None
+        last_update = 0
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                stream.close()
+                return cancelled_result(sample, breaker, time.time() - start_time)
+            if chunk.usage:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token_at is None:
+                    first_token_at = time.time()
+                chunks.append(chunk.choices[0].delta.content)
+                if on_update and time.time() - last_update >= STREAM_UPDATE_INTERVAL:
+                    last_update = time.time()
+                    elapsed = f"{last_update - start_time:.2f}s"
+                    on_update(create_model_card(model_name, "".join(chunks) + " ▌", elapsed, "...", "Running"))
+
+        finished_at = time.time()
+        response_time = f"{finished_at - start_time:.2f}s"
+        response = "".join(chunks)
+        tokens_used = usage.total_tokens if usage else "N/A"
 
-        response_time = f"{time.time() - start_time:.2f}s"
-        response = completion.choices[0].message.content
-        tokens_used = completion.usage.total_tokens if completion.usage else "N/A"
+        sample.update(
+            status="Success",
+            latency_seconds=finished_at - start_time,
+            ttft_seconds=first_token_at - start_time if first_token_at else None,
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None
+        )
+        # Generation speed excludes the wait for the first token
+        if usage and usage.completion_tokens and first_token_at and finished_at > first_token_at:
+            sample["tokens_per_second"] = usage.completion_tokens / (finished_at - first_token_at)
+        metrics.record_call(sample)
+        breaker.record(True)
 
-        return create_model_card(model_name, response, response_time, tokens_used, "Success")
+        return dict(response=response, response_time=response_time, tokens_used=tokens_used, status="Success",
+                    metrics=sample)
 
     except Exception as e:
+        if cancel is not None and cancel.is_set():
+            # The stream was aborted under us
+            if stream is not None:
+                stream.close()
+            return cancelled_result(sample, breaker, time.time() - start_time)
+        sample.update(status="Failed", latency_seconds=time.time() - start_time, error=type(e).__name__)
+        metrics.record_call(sample)
+        breaker.record(False if is_provider_fault(e) else None)
         error_msg = f"Error: {str(e)}"
-        return create_model_card(model_name, error_msg, "N/A", "N/A", "Failed")
+        return dict(response=error_msg, response_time="N/A", tokens_used="N/A", status="Failed", metrics=sample)
+    finally:
+        if stream is not None and hasattr(cancel, "detach"):
+            cancel.detach(stream)
+
+def process_single_model(client, model_id, model_name, image, text_prompt, timeout=MODEL_DEADLINE_SECONDS, on_update=None):
+    """Process image with a single model and return its finished card"""
+    result = run_single_model(client, model_id, model_name, image, text_prompt, timeout, on_update)
+    return create_model_card(model_name, **result)
+
+def route_model_call(client, model_id, model_name, image, text_prompt, hedge=False,
+                     timeout=MODEL_DEADLINE_SECONDS, on_update=None, cancel=None, throttle=None):
+    """Query a model through its circuit breaker, optionally hedging it with its alternate
+
+    With `hedge`, a model whose breaker is open or whose call fails falls back to its
+    alternate, and a model with no first token after its p95-derived delay is raced
+    against the alternate; the first to stream wins and the other is cancelled.
+    The answering model is reported in the result's metrics. Setting `cancel` stops
+    every call made for this request; `throttle(model_id)` runs before each call,
+    alternates included, and the hedge delay only counts from after the primary's wait.
+    """
+    def run(called_id, *args):
+        if throttle:
+            throttle(called_id)
+        return run_single_model(client, called_id, *args)
+
+    alternate = HEDGE_ALTERNATES.get(model_id) if hedge else None
+    if not breaker_for(model_id).allow():
+        if alternate and breaker_for(alternate[0]).allow():
+            return run(*alternate, image, text_prompt, timeout, on_update, cancel)
+        return skipped_result(model_id, model_name)
+    if not alternate:
+        return run(model_id, model_name, image, text_prompt, timeout, on_update, cancel)
+
+    alternate_id, alternate_name = alternate
+    cancels = {model_id: CancelEvent(), alternate_id: CancelEvent()}
+    settled = threading.Event()  # the primary streamed its first token or finished
+    leader = []
+    leader_lock = threading.Lock()
+
+    def forward(racer, other):
+        def update(card):
+            with leader_lock:
+                if not leader:
+                    leader.append(racer)
+                    cancels[other].set()
+            if leader[0] == racer:
+                settled.set()
+                if on_update:
+                    on_update(card)
+        return update
 
-def process_all_models(api_key, image, text_prompt, use_gpt5, use_gemini, use_grok):
-    """Process image with selected models"""
+    # Waiting for a rate-limit slot is not the model being slow, so it happens before the hedge clock
+    if throttle:
+        throttle(model_id)
+    primary = hedge_pool.submit(run_single_model, client, model_id, model_name, image, text_prompt, timeout,
+                                forward(model_id, alternate_id), AnyEvent(cancels[model_id], cancel))
+    primary.add_done_callback(lambda _: settled.set())
+    if settled.wait(hedge_delay(model_id)):
+        result = primary.result()
+        if result["status"] == "Failed" and breaker_for(alternate_id).allow():
+            return run(alternate_id, alternate_name, image, text_prompt, timeout, on_update, cancel)
+        return result
+
+    # The primary is slower than usual to start: race its alternate
+    if not breaker_for(alternate_id).allow():
+        return primary.result()
+    if throttle:
+        throttle(alternate_id)
+        if settled.is_set():  # the primary started answering (or failed) while we waited for a slot
+            result = primary.result()
+            if result["status"] != "Failed":
+                return result
+            return run_single_model(client, alternate_id, alternate_name, image, text_prompt, timeout, on_update,
+                                    cancel)
+    racer = hedge_pool.submit(run_single_model, client, alternate_id, alternate_name, image, text_prompt, timeout,
+                              forward(alternate_id, model_id), AnyEvent(cancels[alternate_id], cancel))
+    results = {}
+    for future in as_completed([primary, racer]):
+        result = future.result()
+        if result["status"] == "Success":
+            for event in cancels.values():
+                event.set()
+            return result
+        results[future is primary] = result
+    # Neither succeeded: report the failure rather than the cancellation, preferring the primary's
+    failures = [r for r in (results[True], results[False]) if r["status"] != "Cancelled"]
+    return failures[0] if failures else results[True]
+
+def selected_models(use_gpt5, use_gemini, use_grok):
+    """Return the (model id, display name) pairs for the ticked models"""
+    flags = {"gpt5": use_gpt5, "gemini": use_gemini, "grok": use_grok}
+    return [AVAILABLE_MODELS[name] for name, enabled in flags.items() if enabled]
+
+def process_all_models(api_key, image, text_prompt, use_gpt5, use_gemini, use_grok,
+                       max_dimension=DEFAULT_MAX_DIMENSION, jpeg_quality=DEFAULT_JPEG_QUALITY, use_cache=True,
+                       hedge=False):
+    """Process image with selected models, yielding the results HTML each time a card changes"""
     if not api_key:
-        return "🔑 Please enter your OpenRouter API key first!"
+        yield "🔑 Please enter your OpenRouter API key first!"
+        return
 
     if image is None:
-        return "📷 Please upload an image first!"
+        yield "📷 Please upload an image first!"
+        return
 
-    # Initialize client with your original structure
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-    )
+    # Reuse the warm client for this key instead of opening new connections per click
+    client = get_client(api_key.strip())
 
-    models_to_process = []
-    if use_gpt5:
-        models_to_process.append(("openai/gpt-5-pro", "GPT-5 Pro"))
-    if use_gemini:
-        models_to_process.append(("google/gemini-2.5-flash-image", "Gemini 2.5 Flash"))
-    if use_grok:
-        models_to_process.append(("x-ai/grok-4-fast", "Grok 4 Fast"))
+    models_to_process = selected_models(use_gpt5, use_gemini, use_grok)
 
     if not models_to_process:
-        return "🤖 Please select at least one model to process!"
+        yield "🤖 Please select at least one model to process!"
+        return
+
+    # Encode once; every model call shares the same immutable payload
+    try:
+        payload = prepare_image(image, max_dimension, jpeg_quality)
+    except Exception as e:
+        yield f"📷 Could not read the image: {str(e)}"
+        return
+
+    cache = response_cache if use_cache else None
+    cache_keys = [
+        ResponseCache.make_key(payload, text_prompt, model_id) if cache else None
+        for model_id, model_name in models_to_process
+    ]
 
     results = []
-    for model_id, model_name in models_to_process:
-        result = process_single_model(client, model_id, model_name, image, text_prompt)
-        results.append(result)
+    pending = set()
+    for index, (model_id, model_name) in enumerate(models_to_process):
+        try:
+            cached = cache.get(cache_keys[index]) if cache else None
+        except sqlite3.Error as e:
+            # e.g. "database is locked" by another serve worker: a miss, not a failed click
+            print(f"⚠️ Could not read cached {model_name} response: {e}")
+            cached = None
+        if cached:
+            response, response_time, tokens_used = cached
+            results.append(create_model_card(model_name, response, f"cached (was {response_time})", tokens_used, "Cached"))
+        else:
+            results.append(create_model_card(model_name, "Waiting for response...", "...", "...", "Running"))
+            pending.add(index)
+    yield "".join(results)
+    if not pending:
+        return
+
+    # Workers report (index, card, finished) so each card updates the moment its model streams
+    updates = queue.Queue()
+    # Set at the deadline or when the page stops listening, so calls still streaming stop
+    # too instead of finishing unseen and being recorded as successes
+    cancel = CancelEvent()
 
-    return "".join(results)
+    def run_model(index, model_id, model_name):
+        result = route_model_call(
+            client, model_id, model_name, payload, text_prompt, hedge=hedge,
+            on_update=lambda partial: updates.put((index, partial, False)), cancel=cancel
+        )
+        # Answers from a hedge alternate are not cached under the primary model
+        if cache and result["status"] == "Success" and result["metrics"]["model_id"] == model_id:
+            try:
+                cache.put(cache_keys[index], model_id, result["response"], result["response_time"], result["tokens_used"])
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not cache {model_name} response: {e}")
+        updates.put((index, create_model_card(model_name, **result), True))
+
+    # Fan out all uncached model requests at once so the wait is the slowest model, not the sum
+    futures = {
+        index: model_pool.submit(run_model, index, *models_to_process[index])
+        for index in sorted(pending)
+    }
+
+    deadline = time.time() + MODEL_DEADLINE_SECONDS
+    try:
+        while pending:
+            try:
+                index, card, finished = updates.get(timeout=max(0, deadline - time.time()))
+            except queue.Empty:
+                break
+            if index not in pending:
+                continue
+            results[index] = card
+            if finished:
+                pending.discard(index)
+            yield "".join(results)
+
+        if pending:
+            cancel.set()
+            for index in pending:
+                futures[index].cancel()
+                error_msg = f"Error: no response within {MODEL_DEADLINE_SECONDS}s"
+                results[index] = create_model_card(models_to_process[index][1], error_msg, "N/A", "N/A", "Failed")
+            yield "".join(results)
+    finally:
+        # Also reached when Gradio closes the generator because the user left or clicked again
+        cancel.set()
+
+# =============================================
+# 📦 BATCH MODE
+# =============================================
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls to at most `per_minute` a minute"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def collect_images(sources):
+    """Expand image files and folders (searched recursively) into a sorted, de-duplicated path list"""
+    if isinstance(sources, (str, Path)):
+        sources = [sources]
+    paths = set()
+    for source in sources:
+        source = Path(source)
+        if source.is_dir():
+            paths.update(p for p in source.rglob("*") if p.suffix.lower() in BATCH_IMAGE_EXTENSIONS)
+        elif source.is_file():
+            paths.add(source)
+        else:
+            raise FileNotFoundError(f"No such image or folder: {source}")
+    return sorted(str(p) for p in paths)
+
+def load_checkpoint(output_path):
+    """Return the (image, model_id) pairs already answered in an existing results file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") in ("Success", "Cached"):
+                done.add((record["image"], record["model_id"]))
+    return done
+
+def upload_id(path):
+    """Checkpoint key for an uploaded image: Gradio copies each upload to a new temp path,
+    so it is keyed on its file name and content hash instead"""
+    digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    return f"{Path(path).name}#{digest[:12]}"
+
+class BatchPayloads:
+    """Encodes each batch image once for all of its model jobs, including concurrent ones
+
+    The first job for an image encodes it while the others wait on the same future; the
+    payload is dropped after the image's last job so a batch doesn't hold every image.
+    """
+
+    def __init__(self, paths, max_dimension, jpeg_quality):
+        self.max_dimension = max_dimension
+        self.jpeg_quality = jpeg_quality
+        self._remaining = Counter(paths)  # path -> jobs not yet released
+        self._futures = {}  # path -> Future of its ImagePayload
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        with self._lock:
+            future = self._futures.get(path)
+            encode = future is None
+            if encode:
+                future = self._futures[path] = Future()
+        if encode:
+            try:
+                with Image.open(path) as image:
+                    future.set_result(prepare_image(image, self.max_dimension, self.jpeg_quality))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def release(self, path):
+        with self._lock:
+            self._remaining[path] -= 1
+            if self._remaining[path] <= 0:
+                self._futures.pop(path, None)
+
+def iter_batch(api_key, images, text_prompt, models, output_path, concurrency=BATCH_DEFAULT_CONCURRENCY,
+               max_dimension=DEFAULT_MAX_DIMENSION, jpeg_quality=DEFAULT_JPEG_QUALITY, use_cache=True,
+               rate_limits=None, hedge=False, image_ids=None):
+    """Run every image through every model, yielding each result record as it completes
+
+    `models` is a list of (model id, display name) pairs. Records are appended to the JSONL
+    file at `output_path`, which doubles as the checkpoint: pairs already answered there are
+    skipped, so an interrupted run resumes where it stopped. Images are recorded under their
+    path unless `image_ids` maps the path to another key.
+    """
+    client = get_client(api_key.strip())
+    cache = response_cache if use_cache else None
+    limits = {**PROVIDER_RATE_LIMITS, **(rate_limits or {})}
+    limiters = {provider: RateLimiter(per_minute) for provider, per_minute in limits.items()}
+
+    image_ids = image_ids or {}
+    done = load_checkpoint(output_path)
+    jobs = []
+    for path in collect_images(images):
+        image_id = image_ids.get(path, path)
+        for model_id, model_name in models:
+            if (image_id, model_id) not in done:
+                done.add((image_id, model_id))  # the same upload twice runs once
+                jobs.append((path, image_id, model_id, model_name))
+    payloads = BatchPayloads([job[0] for job in jobs], max_dimension, jpeg_quality)
+
+    def throttle(model_id):
+        limiter = limiters.get(model_id.split("/", 1)[0])
+        if limiter:
+            limiter.wait()
+
+    write_lock = threading.Lock()
+
+    def run_job(path, image_id, model_id, model_name):
+        try:
+            record = answer(path, image_id, model_id, model_name)
+        finally:
+            payloads.release(path)
+        record["finished_at"] = datetime.now(timezone.utc).isoformat()
+        # Checkpointed by the worker, so an answer is kept even if nobody is reading the generator any more
+        with write_lock:
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+        return record
+
+    def answer(path, image_id, model_id, model_name):
+        record = {"image": image_id, "model_id": model_id, "model": model_name, "prompt": text_prompt}
+        try:
+            payload = payloads.get(path)
+        except Exception as e:
+            return {**record, "status": "Failed", "response": f"Error: {str(e)}",
+                    "response_time": "N/A", "tokens_used": "N/A"}
+        record.update(width=payload.width, height=payload.height)
+
+        key = ResponseCache.make_key(payload, text_prompt, model_id) if cache else None
+        try:
+            cached = cache.get(key) if cache else None
+        except sqlite3.Error as e:
+            # Another worker may hold the database lock; one miss must not stop the batch
+            print(f"⚠️ Could not read cached {model_name} response: {e}")
+            cached = None
+        if cached:
+            response, response_time, tokens_used = cached
+            return {**record, "status": "Cached", "response": response,
+                    "response_time": response_time, "tokens_used": tokens_used}
+
+        # Limits apply to every model actually called, hedge alternates included
+        result = route_model_call(client, model_id, model_name, payload, text_prompt, hedge=hedge,
+                                  throttle=throttle)
+        if cache and result["status"] == "Success" and result["metrics"]["model_id"] == model_id:
+            try:
+                cache.put(key, model_id, result["response"], result["response_time"], result["tokens_used"])
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not cache {model_name} response: {e}")
+        return {**record, **result}
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        pool = ThreadPoolExecutor(max_workers=max(1, int(concurrency)), thread_name_prefix="batch")
+        try:
+            futures = [pool.submit(run_job, *job) for job in jobs]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Closed early (Ctrl+C, Gradio session gone): drop the jobs not started yet and
+            # let the ones in flight write their paid-for answers before the file closes
+            pool.shutdown(wait=True, cancel_futures=True)
+
+def run_batch(*args, on_record=None, **kwargs):
+    """Run `iter_batch` to completion and return counts per status"""
+    summary = {"Success": 0, "Cached": 0, "Failed": 0}
+    for record in iter_batch(*args, **kwargs):
+        summary[record["status"]] = summary.get(record["status"], 0) + 1
+        if on_record:
+            on_record(record)
+    return summary
+
+def export_parquet(jsonl_path, parquet_path=None):
+    """Write the latest record per (image, model) from a results JSONL file to Parquet"""
+    import pandas as pd  # only needed for Parquet export
+
+    parquet_path = parquet_path or str(Path(jsonl_path).with_suffix(".parquet"))
+    records = pd.read_json(jsonl_path, lines=True, dtype=False)
+    records = records.drop_duplicates(subset=["image", "model_id"], keep="last")
+    records.astype({"response_time": str, "tokens_used": str}).to_parquet(parquet_path, index=False)
+    return parquet_path
+
+def process_batch(api_key, files, directory, text_prompt, use_gpt5, use_gemini, use_grok,
+                  max_dimension, jpeg_quality, use_cache, concurrency, output_path, write_parquet, hedge=False):
+    """Gradio handler for batch mode, yielding (progress markdown, result files)"""
+    if not api_key:
+        yield "🔑 Please enter your OpenRouter API key first!", None
+        return
+    models = selected_models(use_gpt5, use_gemini, use_grok)
+    if not models:
+        yield "🤖 Please select at least one model to process!", None
+        return
+
+    uploads = [f if isinstance(f, str) else f.name for f in (files or [])]
+    sources = list(uploads)
+    if directory and directory.strip():
+        sources.append(directory.strip())
+    try:
+        images = collect_images(sources)
+        # Folder images keep their path as the checkpoint key
+        image_ids = {str(Path(path)): upload_id(path) for path in uploads}
+    except OSError as e:
+        yield f"📷 {e}", None
+        return
+    if not images:
+        yield "📷 Please upload images or enter a folder first!", None
+        return
+
+    output_path = (output_path or "").strip() or "batch_results.jsonl"
+    pairs = {(image_ids.get(path, path), model_id) for path in images for model_id, _ in models}
+    total = len(pairs - load_checkpoint(output_path))
+    counts = {"Success": 0, "Cached": 0, "Failed": 0}
+    yield f"⏳ Processing {total} image/model pairs from {len(images)} images...", None
+
+    last_update = 0
+    for record in iter_batch(api_key, images, text_prompt, models, output_path, concurrency,
+                             max_dimension, jpeg_quality, use_cache, hedge=hedge, image_ids=image_ids):
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+        if time.time() - last_update >= STREAM_UPDATE_INTERVAL:
+            last_update = time.time()
+            yield (f"⏳ {sum(counts.values())}/{total} done | ✅ {counts['Success']} "
+                   f"| ♻️ {counts['Cached']} | ❌ {counts['Failed']}"), None
+
+    result_files = [output_path]
+    if write_parquet:
+        try:
+            result_files.append(export_parquet(output_path))
+        except Exception as e:
+            print(f"⚠️ Parquet export failed: {e}")
+    yield (f"✅ Batch finished: {counts['Success']} answered, {counts['Cached']} from cache, "
+           f"{counts['Failed']} failed. Run it again to retry failures."), result_files
 
 # Create the Gradio interface
 with gr.Blocks(css=custom_css, theme=gr.themes.Default(primary_hue="red")) as demo:
@@ -351,6 +1353,35 @@ with gr.Blocks(css=custom_css, theme=gr.themes.Default(primary_hue="red")) as de
                     use_gpt5 = gr.Checkbox(label="GPT-5 Pro", value=True)
                     use_gemini = gr.Checkbox(label="Gemini 2.5 Flash", value=True)
                     use_grok = gr.Checkbox(label="Grok 4 Fast", value=True)
+                    use_cache = gr.Checkbox(
+                        label="♻️ Reuse cached answers",
+                        value=response_cache is not None,
+                        interactive=response_cache is not None,
+                        info="Repeat analyses of the same image and prompt return instantly"
+                    )
+                    use_hedge = gr.Checkbox(
+                        label="🛡️ Hedge slow models",
+                        value=False,
+                        info="Race a backup model when one is slower than usual to respond or failing"
+                    )
+
+                # Image Preparation
+                with gr.Accordion("🖼️ Image Settings", open=False, elem_classes="accordion"):
+                    max_dimension = gr.Slider(
+                        label="Max Dimension (px)",
+                        minimum=256,
+                        maximum=4096,
+                        step=64,
+                        value=DEFAULT_MAX_DIMENSION,
+                        info="Larger images are downscaled before upload"
+                    )
+                    jpeg_quality = gr.Slider(
+                        label="JPEG Quality",
+                        minimum=40,
+                        maximum=95,
+                        step=5,
+                        value=DEFAULT_JPEG_QUALITY
+                    )
 
                 # Process Button
                 process_btn = gr.Button(
@@ -381,6 +1412,23 @@ with gr.Blocks(css=custom_css, theme=gr.themes.Default(primary_hue="red")) as de
             label="Click on any example to use it"
         )
 
+    # Batch Mode
+    with gr.Accordion("📦 Batch Mode", open=False, elem_classes="accordion"):
+        gr.Markdown("Run many images through the selected models with the prompt above. "
+                    "Running again with the same results file resumes where it stopped.")
+        with gr.Row():
+            batch_files = gr.File(label="📁 Images", file_count="multiple", file_types=["image"])
+            with gr.Column():
+                batch_directory = gr.Textbox(label="📂 Or a folder on the server", placeholder="/path/to/images")
+                batch_output = gr.Textbox(label="🧾 Results File (JSONL)", value="batch_results.jsonl")
+                batch_concurrency = gr.Slider(
+                    label="Parallel Requests", minimum=1, maximum=32, step=1, value=BATCH_DEFAULT_CONCURRENCY
+                )
+                batch_parquet = gr.Checkbox(label="Also write Parquet", value=False)
+        batch_btn = gr.Button("📦 Run Batch", variant="primary", elem_classes="btn-primary")
+        batch_status = gr.Markdown()
+        batch_results = gr.File(label="📥 Results", file_count="multiple")
+
     # Footer
     gr.Markdown("---", elem_classes="footer")
     gr.Markdown(
@@ -392,10 +1440,164 @@ with gr.Blocks(css=custom_css, theme=gr.themes.Default(primary_hue="red")) as de
     # Event handling
     process_btn.click(
         fn=process_all_models,
-        inputs=[api_key, image_input, text_prompt, use_gpt5, use_gemini, use_grok],
-        outputs=output_html
+        inputs=[api_key, image_input, text_prompt, use_gpt5, use_gemini, use_grok, max_dimension, jpeg_quality, use_cache, use_hedge],
+        outputs=output_html,
+        concurrency_limit="default",  # set by configure_serving()
+        concurrency_id="analyze"
+    )
+    batch_btn.click(
+        fn=process_batch,
+        inputs=[api_key, batch_files, batch_directory, text_prompt, use_gpt5, use_gemini, use_grok,
+                max_dimension, jpeg_quality, use_cache, batch_concurrency, batch_output, batch_parquet, use_hedge],
+        outputs=[batch_status, batch_results],
+        # A batch already runs its own parallel requests, so don't let several pile up
+        concurrency_limit=BATCH_CONCURRENCY_LIMIT,
+        concurrency_id="batch"
+    )
+
+def configure_serving(concurrency=UI_CONCURRENCY_LIMIT, max_queue=QUEUE_MAX_SIZE):
+    """Let `concurrency` clicks run at once with up to `max_queue` waiting, sizing the model pools to match
+
+    Returns the thread count Gradio needs for the handlers.
+    """
+    global model_pool, hedge_pool, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS
+    calls = concurrency * len(AVAILABLE_MODELS)
+    if concurrency != UI_CONCURRENCY_LIMIT:
+        model_pool.shutdown(wait=False)
+        hedge_pool.shutdown(wait=False)
+        model_pool = ThreadPoolExecutor(max_workers=calls, thread_name_prefix="model")
+        hedge_pool = ThreadPoolExecutor(max_workers=2 * calls, thread_name_prefix="hedge")
+        HTTP_MAX_CONNECTIONS = 2 * calls
+        HTTP_MAX_KEEPALIVE_CONNECTIONS = calls
+    # Beyond max_size, new clicks get an immediate "queue full" instead of an ever-growing wait
+    demo.queue(default_concurrency_limit=concurrency, max_size=max_queue)
+    return max(40, concurrency + BATCH_CONCURRENCY_LIMIT + 8)
+
+def nginx_config(ports, listen=80):
+    """nginx front end spreading users over worker ports, pinning each user to one worker"""
+    servers = "\n".join(f"    server 127.0.0.1:{port};" for port in ports)
+    return f"""upstream vision_assistant {{
+    ip_hash;  # Gradio sessions and queues live in one worker
+{servers}
+}}
+
+server {{
+    listen {listen};
+    client_max_body_size 50m;
+
+    location / {{
+        proxy_pass http://vision_assistant;
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection "upgrade";
+        proxy_set_header Host $host;
+        proxy_buffering off;  # stream cards as they arrive
+        proxy_read_timeout 300s;
+    }}
+}}"""
+
+def serve_workers(args):
+    """Run `args.workers` single-process servers on consecutive ports until one exits or Ctrl+C"""
+    ports = [args.port + i for i in range(args.workers)]
+    workers = []
+    for i, port in enumerate(ports):
+        command = [sys.executable, os.path.abspath(__file__)]
+        if args.metrics_port:
+            command += ["--metrics-port", str(args.metrics_port + i)]
+        if args.metrics_file:
+            command += ["--metrics-file", args.metrics_file]
+        command += ["serve", "--host", args.host, "--port", str(port), "--workers", "1",
+                    "--concurrency", str(args.concurrency), "--max-queue", str(args.max_queue)]
+        workers.append(subprocess.Popen(command))
+
+    print(f"🎯 {len(workers)} workers on ports {ports[0]}-{ports[-1]}. Put them behind one front end, e.g. nginx:\n")
+    print(nginx_config(ports))
+    try:
+        while all(worker.poll() is None for worker in workers):
+            time.sleep(1)
+        print("⚠️ A worker exited, stopping the others")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+
+def main(argv=None):
+    """Launch the UI, `serve` it for many users, or run `batch IMAGE_OR_FOLDER ...` headless"""
+    parser = argparse.ArgumentParser(description="🌟 AI Vision Assistant")
+    subparsers = parser.add_subparsers(dest="command")
+    batch_parser = subparsers.add_parser("batch", help="Analyze many images without the UI")
+    batch_parser.add_argument("images", nargs="+", help="Image files or folders (searched recursively)")
+    batch_parser.add_argument("--prompt", default="What is in this image? Describe it in detail.")
+    batch_parser.add_argument("--models", nargs="+", choices=list(AVAILABLE_MODELS), default=list(AVAILABLE_MODELS))
+    batch_parser.add_argument("--output", default="batch_results.jsonl",
+                              help="Results JSONL, also used as the resume checkpoint")
+    batch_parser.add_argument("--parquet", nargs="?", const="", default=None,
+                              help="Also write Parquet (defaults to the output name with .parquet)")
+    batch_parser.add_argument("--concurrency", type=int, default=BATCH_DEFAULT_CONCURRENCY)
+    batch_parser.add_argument("--max-dimension", type=int, default=DEFAULT_MAX_DIMENSION)
+    batch_parser.add_argument("--jpeg-quality", type=int, default=DEFAULT_JPEG_QUALITY)
+    batch_parser.add_argument("--rate-limit", action="append", default=[], metavar="PROVIDER=PER_MINUTE",
+                              help="Override a provider's requests per minute, e.g. openai=20")
+    batch_parser.add_argument("--no-cache", action="store_true", help="Ignore cached answers")
+    batch_parser.add_argument("--hedge", action="store_true", help="Race a backup model when one is slow or failing")
+    batch_parser.add_argument("--api-key", default=os.getenv("OPENROUTER_API_KEY"))
+    serve_parser = subparsers.add_parser("serve", help="Serve the UI for many users, optionally from several processes")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=7860, help="Port of the first worker")
+    serve_parser.add_argument("--workers", type=int, default=1, help="Worker processes on consecutive ports")
+    serve_parser.add_argument("--concurrency", type=int, default=UI_CONCURRENCY_LIMIT,
+                              help="Clicks analysed at once per worker")
+    serve_parser.add_argument("--max-queue", type=int, default=QUEUE_MAX_SIZE,
+                              help="Clicks allowed to wait per worker before new ones are rejected")
+    serve_parser.add_argument("--share", action="store_true", help="Also create a public Gradio link")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="Serve Prometheus metrics on this port (0 = off)")
+    parser.add_argument("--metrics-file", default=METRICS_JSONL_PATH, help="Append per-call metrics to this JSONL file")
+    if argv is None and "ipykernel" in sys.modules:
+        # Run as a notebook cell, sys.argv holds the kernel's own flags (-f kernel.json), not ours
+        argv = []
+    args = parser.parse_args(argv)
+
+    if args.command == "serve" and args.workers > 1:
+        serve_workers(args)
+        return
+
+    metrics.jsonl_path = args.metrics_file
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    if args.command is None:
+        print("🎯 Launching Dark Theme AI Vision Assistant...")
+        demo.launch(share=True, debug=False, max_threads=configure_serving())
+        return
+    if args.command == "serve":
+        print(f"🎯 Serving on {args.host}:{args.port} ({args.concurrency} concurrent clicks, queue of {args.max_queue})")
+        demo.launch(server_name=args.host, server_port=args.port, share=args.share, debug=False,
+                    max_threads=configure_serving(args.concurrency, args.max_queue))
+        return
+
+    if not args.api_key:
+        parser.error("an OpenRouter API key is required (--api-key or OPENROUTER_API_KEY)")
+    rate_limits = {}
+    for spec in args.rate_limit:
+        provider, _, per_minute = spec.partition("=")
+        rate_limits[provider] = float(per_minute)
+
+    def report(record):
+        print(f"{record['status']:>7} | {record['model']:<16} | {record['image']}", file=sys.stderr)
+
+    summary = run_batch(
+        args.api_key, args.images, args.prompt, [AVAILABLE_MODELS[name] for name in args.models], args.output,
+        concurrency=args.concurrency, max_dimension=args.max_dimension, jpeg_quality=args.jpeg_quality,
+        use_cache=not args.no_cache, rate_limits=rate_limits, hedge=args.hedge, on_record=report
     )
+    print(f"✅ {summary['Success']} answered, {summary['Cached']} from cache, {summary['Failed']} failed -> {args.output}")
+    if args.parquet is not None:
+        print(f"🧾 Parquet written to {export_parquet(args.output, args.parquet or None)}")
 
-# Launch the interface
-print("🎯 Launching Dark Theme AI Vision Assistant...")
-demo.launch(share=True, debug=False)
\ No newline at end of file
+# Launch the interface, or run a headless batch
+if __name__ == "__main__":
+    main()
\ No newline at end of file